@@ -1,17 +1,64 @@
-import pkg_resources
+import importlib
+import pkgutil
+import sys
+import types
 
 
 default_app_config = "pinax.api.apps.AppConfig"
-__version__ = pkg_resources.get_distribution("pinax-api").version
+__version__ = "0.1.0"
 
 
-from . import authentication, permissions  # noqa
-from .http import Response, Redirect  # noqa
-from .mixins import DjangoModelEndpointSetMixin  # noqa
 from .registry import register, bind, registry  # noqa
-from .relationships import Relationship  # noqa
-from .resource import Resource, Attribute  # noqa
-from .tests.test import TestCase  # noqa
-from .urls import URL as url  # noqa
-from .views import handler404  # noqa
-from .endpoints import ResourceEndpointSet, RelationshipEndpointSet  # noqa
+
+
+# Public API, imported on first attribute access so `import pinax.api`
+# (and Django app loading) does not pull in views, models or django.test.
+exports = {
+    "authentication": (".authentication", None),
+    "hooks": (".hooks", None),
+    "permissions": (".permissions", None),
+    "ratelimit": (".ratelimit", None),
+    "Response": (".http", "Response"),
+    "Redirect": (".http", "Redirect"),
+    "DjangoModelEndpointSetMixin": (".mixins", "DjangoModelEndpointSetMixin"),
+    "Relationship": (".relationships", "Relationship"),
+    "Resource": (".resource", "Resource"),
+    "Attribute": (".resource", "Attribute"),
+    "TestCase": (".tests.test", "TestCase"),
+    "url": (".urls", "URL"),
+    "Router": (".routers", "Router"),
+    "handler404": (".views", "handler404"),
+    "ResourceEndpointSet": (".endpoints", "ResourceEndpointSet"),
+    "RelationshipEndpointSet": (".endpoints", "RelationshipEndpointSet"),
+}
+
+
+def load(module, name):
+    if name in exports:
+        module_name, attr = exports[name]
+        value = importlib.import_module(module_name, module.__name__)
+        if attr is not None:
+            value = getattr(value, attr)
+    elif name in set(info[1] for info in pkgutil.iter_modules(module.__path__)):
+        value = importlib.import_module("." + name, module.__name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(module.__name__, name))
+    setattr(module, name, value)
+    return value
+
+
+class LazyModule(types.ModuleType):
+
+    def __getattr__(self, name):
+        return load(self, name)
+
+    def __dir__(self):
+        return sorted(set(super(LazyModule, self).__dir__()) | set(exports))
+
+
+if sys.version_info >= (3, 5):
+    sys.modules[__name__].__class__ = LazyModule
+else:
+    # module classes cannot be swapped; import everything up front
+    for export in exports:
+        load(sys.modules[__name__], export)
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 from django.apps import AppConfig as BaseAppConfig
+from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -9,3 +10,11 @@ class AppConfig(BaseAppConfig):
     name = "pinax.api"
     label = "pinax_api"
     verbose_name = _("Pinax Api")
+
+    def ready(self):
+        from .memory import memory_enabled, start_tracing
+        if memory_enabled():
+            start_tracing()
+        if getattr(settings, "PINAX_API_WARMUP", False):
+            from .warmup import warm_up
+            warm_up()
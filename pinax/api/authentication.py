@@ -1,3 +1,10 @@
+from __future__ import unicode_literals
+
+import hashlib
+
+from .exceptions import AuthenticationFailed
+
+
 def add(backends):
     def decorator(func):
         func.authentication = backends
@@ -5,9 +12,82 @@ def add(backends):
     return decorator
 
 
+def authenticate(backend, request):
+    """
+    Calls `backend.authenticate(request)` at most once per request, so
+    nested dispatch reuses the outcome (user, None or AuthenticationFailed).
+    """
+    results = request.__dict__.setdefault("pinax_api_authentication", {})
+    if backend not in results:
+        try:
+            results[backend] = (backend.authenticate(request), None)
+        except AuthenticationFailed as exc:
+            results[backend] = (None, exc)
+    user, exc = results[backend]
+    if exc is not None:
+        raise exc
+    return user
+
+
+def authorization_header(request):
+    return request.META.get("HTTP_AUTHORIZATION")
+
+
 class Anonymous(object):
 
     def authenticate(self, request):
         if not request.user.is_authenticated():
             from django.contrib.auth.models import AnonymousUser
             return AnonymousUser()
+
+
+class Cached(object):
+    """
+    Wraps an authentication backend and caches the user it returns, keyed
+    on a SHA-256 hash of the request credential, for `ttl` seconds.
+
+    `credential` is a callable returning the credential presented by a
+    request (the Authorization header by default). Requests without a
+    credential, and failed or undetermined authentication, are not cached.
+    """
+
+    def __init__(self, backend, credential=authorization_header, ttl=300, cache="default", key_prefix=None):
+        self.backend = backend
+        self.credential = credential
+        self.ttl = ttl
+        self.cache_alias = cache
+        if key_prefix is None:
+            key_prefix = "pinax-api-auth:{}.{}".format(type(backend).__module__, type(backend).__name__)
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def cache_key(self, credential):
+        return "{}:{}".format(self.key_prefix, hashlib.sha256(credential.encode("utf-8")).hexdigest())
+
+    def authenticate(self, request):
+        credential = self.credential(request)
+        if not credential:
+            return self.backend.authenticate(request)
+        key = self.cache_key(credential)
+        user = self.cache.get(key)
+        if user is None:
+            user = self.backend.authenticate(request)
+            if user is not None:
+                self.cache.set(key, user, self.ttl)
+        return user
+
+    def revoke(self, credential):
+        """
+        Forgets the cached user for `credential`; call when a token or API
+        key is deleted or rotated.
+        """
+        self.cache.delete(self.cache_key(credential))
+
+    def revoke_request(self, request):
+        credential = self.credential(request)
+        if credential:
+            self.revoke(credential)
@@ -1,8 +1,14 @@
+import hashlib
 import inspect
+import json
 import operator
 import re
 
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import lru_cache
+
+
+DOCS_CACHE_SIZE = 32  # rendered documents kept per view (one per host)
 
 
 class Action:
@@ -58,8 +64,8 @@ def endpointset_actions(endpointset, **kwargs):
     for method, attr in endpointset.view_mapping(**kwargs).items():
         view = getattr(endpointset, attr, None)
         if view is not None:
-            doc = trim(view.__doc__).splitlines()
-            if doc[0].startswith("Identifier: "):
+            doc = trim(view.__doc__ or "").splitlines()
+            if doc and doc[0].startswith("Identifier: "):
                 identifier = doc[0][12:]
                 doc = doc[1:]
             else:
@@ -98,13 +104,20 @@ class DocumentationGenerator:
                 resource_group.resources.append(resource)
             # wrap up
             resource_groups.append(resource_group)
-        return cls(api.name, trim(api.__doc__), api.host, resource_groups)
+        return cls(api.name, trim(api.__doc__), getattr(api, "host", None), resource_groups, getattr(api, "version", "1.0"))
 
-    def __init__(self, name, description, host, resource_groups):
+    def __init__(self, name, description, host, resource_groups, version="1.0"):
         self.name = name
         self.description = description
         self.host = host
         self.resource_groups = resource_groups
+        self.version = version
+
+    def with_host(self, host):
+        """
+        Returns a generator sharing this documentation model for `host`.
+        """
+        return type(self)(self.name, self.description, host, self.resource_groups, self.version)
 
     def render(self):
         lines = ["FORMAT: 1A"]
@@ -137,17 +150,86 @@ class DocumentationGenerator:
                         lines.extend(action.doc.splitlines())
         return "\n".join(lines)
 
+    def render_openapi(self):
+        """
+        Renders the documentation as an OpenAPI 3 JSON document.
+        """
+        doc = {
+            "openapi": "3.0.0",
+            "info": {
+                "title": self.name,
+                "version": self.version,
+            },
+            "tags": [],
+            "paths": {},
+        }
+        if self.description:
+            doc["info"]["description"] = self.description
+        if self.host:
+            doc["servers"] = [{"url": self.host}]
+        for resource_group in self.resource_groups:
+            tag = {"name": resource_group.name}
+            if resource_group.doc:
+                tag["description"] = trim(resource_group.doc)
+            doc["tags"].append(tag)
+            for resource in resource_group.resources:
+                path = doc["paths"].setdefault("/{}".format(resource.url), {})
+                parameters = [
+                    {"name": name, "in": "path", "required": True, "schema": {"type": "string"}}
+                    for name in re.findall(r"\{(\w+)\}", resource.url)
+                ]
+                if parameters:
+                    path["parameters"] = parameters
+                for action in resource.actions:
+                    operation = {
+                        "summary": action.identifier,
+                        "tags": [resource_group.name],
+                        "responses": {
+                            "default": {
+                                "description": "JSON:API document",
+                                "content": {"application/vnd.api+json": {}},
+                            },
+                        },
+                    }
+                    if action.doc:
+                        operation["description"] = action.doc
+                    path[action.method.lower()] = operation
+        return json.dumps(doc, indent=2, sort_keys=True)
+
 
 def trim(docstring):
     return inspect.cleandoc(docstring)
 
 
-def doc_view(api):
+def cached_doc_view(api, render, content_type):
+    """
+    Returns a view serving `render(generator)` for `api`. The documentation
+    model is built once, each host's document is rendered once and kept in
+    memory, and responses carry an ETag so clients can revalidate cheaply.
+    """
+    generator = DocumentationGenerator.from_api(api())
+
+    @lru_cache.lru_cache(maxsize=DOCS_CACHE_SIZE)
+    def document(host):
+        content = render(generator.with_host(host)).encode("utf-8")
+        return content, '"{}"'.format(hashlib.sha1(content).hexdigest())
+
     def view(request):
-        a = api()
-        a.host = "{}://{}".format(request.scheme, request.get_host())
-        dg = DocumentationGenerator.from_api(a)
-        response = HttpResponse(dg.render())
-        response["Content-Type"] = "text/vnd.apiblueprint"
+        content, etag = document("{}://{}".format(request.scheme, request.get_host()))
+        if etag in [tag.strip() for tag in request.META.get("HTTP_IF_NONE_MATCH", "").split(",")]:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content)
+            response["Content-Type"] = content_type
+        response["ETag"] = etag
         return response
+    view.document = document
     return view
+
+
+def doc_view(api):
+    return cached_doc_view(api, DocumentationGenerator.render, "text/vnd.apiblueprint")
+
+
+def openapi_view(api):
+    return cached_doc_view(api, DocumentationGenerator.render_openapi, "application/vnd.oai.openapi+json")
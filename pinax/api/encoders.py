@@ -0,0 +1,267 @@
+from __future__ import unicode_literals
+
+import json
+import struct
+
+from django.utils import six
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JSONCodec(object):
+
+    name = "JSON"
+    media_type = "application/vnd.api+json"
+    aliases = ("application/json",)
+
+    def dumps(self, data):
+        return json.dumps(data, sort_keys=True).encode("utf-8")
+
+    def loads(self, content, charset="utf-8"):
+        try:
+            return json.loads(content.decode(charset))
+        except RuntimeError:
+            # RecursionError on Python 3
+            raise ValueError("JSON data nested too deeply")
+
+
+class MessagePackCodec(object):
+    """
+    MessagePack encoding of the same JSON:API documents. Uses the `msgpack`
+    package when installed and a pure-Python implementation otherwise.
+    """
+
+    name = "MessagePack"
+    media_type = "application/msgpack"
+    aliases = ("application/x-msgpack", "application/vnd.msgpack")
+
+    def dumps(self, data):
+        if msgpack is not None:
+            return msgpack.packb(data, use_bin_type=True)
+        return packb(data)
+
+    def loads(self, content, charset="utf-8"):
+        if msgpack is None:
+            return unpackb(content)
+        try:
+            return msgpack.unpackb(content, raw=False)
+        except TypeError:
+            raise ValueError("Unhashable MessagePack map key")
+
+
+json_codec = JSONCodec()
+msgpack_codec = MessagePackCodec()
+DEFAULT_CODECS = (json_codec, msgpack_codec)
+
+
+def find_codec(media_type, codecs=DEFAULT_CODECS):
+    media_type = media_type.split(";")[0].strip().lower()
+    for codec in codecs:
+        if media_type == codec.media_type or media_type in codec.aliases:
+            return codec
+    return None
+
+
+def parse_accept(accept):
+    """
+    Yields `(media type, q)` pairs from an `Accept` header value.
+    """
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        yield media_type.strip().lower(), q
+
+
+def negotiate(accept, codecs=DEFAULT_CODECS):
+    """
+    Returns the codec the `Accept` header value prefers, falling back to
+    the first codec (JSON) for wildcards and unsupported types.
+    """
+    best, best_q = codecs[0], 0.0
+    for media_type, q in parse_accept(accept):
+        codec = find_codec(media_type, codecs)
+        if codec is not None and q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+# Pure-Python MessagePack for JSON-compatible values.
+
+def packb(obj):
+    out = []
+    pack_into(obj, out)
+    return b"".join(out)
+
+
+def pack_into(obj, out):
+    if obj is None:
+        out.append(b"\xc0")
+    elif obj is True:
+        out.append(b"\xc3")
+    elif obj is False:
+        out.append(b"\xc2")
+    elif isinstance(obj, six.integer_types):
+        out.append(pack_int(obj))
+    elif isinstance(obj, float):
+        out.append(struct.pack(">Bd", 0xcb, obj))
+    elif isinstance(obj, six.text_type):
+        data = obj.encode("utf-8")
+        out.append(pack_length(len(data), 0xa0, 31, (0xd9, 0xda, 0xdb)) + data)
+    elif isinstance(obj, six.binary_type):
+        out.append(pack_length(len(obj), None, -1, (0xc4, 0xc5, 0xc6)) + obj)
+    elif isinstance(obj, (list, tuple)):
+        out.append(pack_length(len(obj), 0x90, 15, (None, 0xdc, 0xdd)))
+        for item in obj:
+            pack_into(item, out)
+    elif isinstance(obj, dict):
+        out.append(pack_length(len(obj), 0x80, 15, (None, 0xde, 0xdf)))
+        for key, value in obj.items():
+            pack_into(key, out)
+            pack_into(value, out)
+    else:
+        raise TypeError("{!r} is not MessagePack serializable".format(obj))
+
+
+def pack_int(n):
+    if 0 <= n <= 0x7f:
+        return struct.pack(">B", n)
+    if -32 <= n < 0:
+        return struct.pack(">b", n)
+    if n > 0:
+        for code, fmt, limit in ((0xcc, "B", 0xff), (0xcd, "H", 0xffff), (0xce, "I", 0xffffffff), (0xcf, "Q", 0xffffffffffffffff)):
+            if n <= limit:
+                return struct.pack(">B" + fmt, code, n)
+    else:
+        for code, fmt, limit in ((0xd0, "b", 0x80), (0xd1, "h", 0x8000), (0xd2, "i", 0x80000000), (0xd3, "q", 0x8000000000000000)):
+            if -n <= limit:
+                return struct.pack(">B" + fmt, code, n)
+    raise OverflowError("integer {} out of MessagePack range".format(n))
+
+
+def pack_length(n, fix, fix_max, codes):
+    if n <= fix_max:
+        return struct.pack(">B", fix | n)
+    for code, fmt, limit in zip(codes, ("B", "H", "I"), (0xff, 0xffff, 0xffffffff)):
+        if code is not None and n <= limit:
+            return struct.pack(">B" + fmt, code, n)
+    raise ValueError("object too large for MessagePack")
+
+
+def unpackb(data, max_depth=None):
+    """
+    Decodes a MessagePack object. Raises ValueError for malformed data,
+    including unhashable map keys and arrays or maps nested more than
+    `max_depth` (MAX_DEPTH by default) levels deep.
+    """
+    if max_depth is None:
+        max_depth = MAX_DEPTH
+    try:
+        obj, offset = unpack_from(bytearray(data), 0, max_depth)
+    except RuntimeError:
+        # RecursionError on Python 3, should max_depth exceed the stack
+        raise ValueError("MessagePack data nested too deeply")
+    if offset != len(data):
+        raise ValueError("Extra data after MessagePack object")
+    return obj
+
+
+MAX_DEPTH = 100
+FIXED = {0xc0: None, 0xc2: False, 0xc3: True}
+NUMBERS = {
+    0xca: ">f", 0xcb: ">d",
+    0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+    0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+}
+LENGTHS = {
+    0xd9: ("str", ">B"), 0xda: ("str", ">H"), 0xdb: ("str", ">I"),
+    0xc4: ("bin", ">B"), 0xc5: ("bin", ">H"), 0xc6: ("bin", ">I"),
+    0xdc: ("array", ">H"), 0xdd: ("array", ">I"),
+    0xde: ("map", ">H"), 0xdf: ("map", ">I"),
+}
+
+
+def unpack_from(data, offset, depth=MAX_DEPTH):
+    try:
+        code = data[offset]
+    except IndexError:
+        raise ValueError("Unexpected end of MessagePack data")
+    offset += 1
+    if code <= 0x7f:
+        return code, offset
+    if code >= 0xe0:
+        return code - 0x100, offset
+    if code in FIXED:
+        return FIXED[code], offset
+    if code in NUMBERS:
+        return read_struct(data, offset, NUMBERS[code])
+    kind, length, offset = read_header(data, code, offset)
+    if kind in ("str", "bin"):
+        return read_bytes(data, offset, length, kind)
+    if depth <= 0:
+        raise ValueError("MessagePack data nested too deeply")
+    if kind == "array":
+        return read_array(data, offset, length, depth - 1)
+    return read_map(data, offset, length, depth - 1)
+
+
+def read_struct(data, offset, fmt):
+    end = offset + struct.calcsize(fmt)
+    if end > len(data):
+        raise ValueError("Unexpected end of MessagePack data")
+    return struct.unpack(fmt, bytes(data[offset:end]))[0], end
+
+
+def read_header(data, code, offset):
+    """
+    Returns `(kind, length, offset)` for a str, bin, array or map type code.
+    """
+    if 0xa0 <= code <= 0xbf:
+        return "str", code & 0x1f, offset
+    if 0x90 <= code <= 0x9f:
+        return "array", code & 0x0f, offset
+    if 0x80 <= code <= 0x8f:
+        return "map", code & 0x0f, offset
+    if code in LENGTHS:
+        kind, fmt = LENGTHS[code]
+        length, offset = read_struct(data, offset, fmt)
+        return kind, length, offset
+    raise ValueError("Unsupported MessagePack type 0x{:02x}".format(code))
+
+
+def read_bytes(data, offset, length, kind):
+    end = offset + length
+    if end > len(data):
+        raise ValueError("Unexpected end of MessagePack data")
+    value = bytes(data[offset:end])
+    return (value.decode("utf-8") if kind == "str" else value), end
+
+
+def read_array(data, offset, length, depth):
+    items = []
+    for _ in range(length):
+        item, offset = unpack_from(data, offset, depth)
+        items.append(item)
+    return items, offset
+
+
+def read_map(data, offset, length, depth):
+    items = {}
+    for _ in range(length):
+        key, offset = unpack_from(data, offset, depth)
+        value, offset = unpack_from(data, offset, depth)
+        # JSON:API documents only have string keys; like msgpack's
+        # strict_map_key this also rejects unhashable keys
+        if not isinstance(key, six.text_type):
+            raise ValueError("MessagePack map keys must be strings")
+        items[key] = value
+    return items, offset
@@ -1,36 +1,92 @@
 from __future__ import unicode_literals
 
+import collections
 import contextlib
 import functools
-import json
 import logging
 import traceback
 
 from django.conf import settings
 from django.conf.urls import url
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.http import HttpResponse, Http404
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django.views.generic import View
 from django.views.decorators.csrf import csrf_exempt
 
-from .exceptions import ErrorResponse, AuthenticationFailed, SerializationError
+from .authentication import authenticate
+from .encoders import DEFAULT_CODECS, find_codec, json_codec, negotiate, parse_accept
+from .exceptions import ErrorResponse, AuthenticationFailed, MemoryBudgetExceeded, PayloadTooLarge, SerializationError
 from .http import Response
+from .instrumentation import get_instrumentation, null_instrumentation
 from .jsonapi import TopLevel, Included
+from .jsonstream import DocumentStream
+from .memory import get_memory_tracker, null_memory_tracker
+from .permissions import ObjectPermission, overrides
+from .profiling import get_profiler
+from .resource import iterate_chunks, parse_include, resource_class_of
+from .schema import compile_schema
 
 
 logger = logging.getLogger(__name__)
 
 
+class Chain(object):
+    """
+    Authentication backends, permissions and pre/post hooks for a single
+    endpoint, combining the endpoint's own (decorator) lists with the class
+    `middleware` lists. Built once per endpoint rather than per request.
+    """
+
+    def __init__(self, authentication, permissions, pre, post):
+        self.authentication = authentication
+        self.permissions = permissions
+        self.object_permissions = [perm for perm in permissions if isinstance(perm, ObjectPermission)]
+        self.pre = pre
+        self.post = post
+
+    @classmethod
+    def build(cls, endpointset, method):
+        return cls.from_endpoint(endpointset, getattr(endpointset, method, None))
+
+    @classmethod
+    def from_endpoint(cls, endpointset, endpoint):
+        middleware = getattr(endpointset, "middleware", {})
+
+        def combine(key):
+            return list(getattr(endpoint, key, [])) + list(middleware.get(key, []))
+
+        return cls(
+            authentication=combine("authentication"),
+            permissions=combine("permissions"),
+            pre=combine("pre"),
+            post=combine("post"),
+        )
+
+    def __repr__(self):
+        return "<Chain authentication={!r} permissions={!r} pre={!r} post={!r}>".format(
+            self.authentication,
+            self.permissions,
+            self.pre,
+            self.post,
+        )
+
+
 class EndpointSet(View):
 
     @classmethod
     def as_view(cls, **initkwargs):
         view_mapping_kwargs = initkwargs.pop("view_mapping_kwargs", {})
         view = super(EndpointSet, cls).as_view(**initkwargs)
+        mapping = cls.view_mapping(**view_mapping_kwargs)
+        # compile middleware chains while URLs are built
+        for method in list(mapping.values()) + ["http_method_not_allowed"]:
+            if hasattr(cls, method):
+                cls.get_chain(method)
 
         def view(request, *args, **kwargs):
             self = cls(**initkwargs)
-            mapping = cls.view_mapping(**view_mapping_kwargs)
             for verb, method in mapping.items():
                 if hasattr(self, method):
                     setattr(self, verb, getattr(self, method))
@@ -44,22 +100,99 @@ class EndpointSet(View):
         functools.update_wrapper(view, cls.dispatch, assigned=())
         return csrf_exempt(view)
 
+    @classmethod
+    def get_chain(cls, method):
+        """
+        Returns the compiled Chain for endpoint method name `method`.
+        """
+        chains = cls.__dict__.get("chains")
+        if chains is None:
+            chains = cls.chains = {}
+        chain = chains.get(method)
+        if chain is None:
+            chain = chains[method] = Chain.build(cls, method)
+        return chain
+
+    @classmethod
+    def reset_chains(cls):
+        """
+        Discards compiled chains; call after changing `middleware` or
+        endpoint decorators at runtime.
+        """
+        cls.chains = {}
+
+    instrumentation = null_instrumentation
+    memory = null_memory_tracker
+    # maximum request body size in bytes; None uses PINAX_API_MAX_BODY_SIZE
+    max_body_size = None
+    # collection page sizes; None uses PINAX_API_PAGE_SIZE / PINAX_API_MAX_PAGE_SIZE
+    page_size = None
+    max_page_size = None
+    # whether clients may request the whole collection with page[size]=0
+    allow_unpaginated = False
+    # None uses Django's Paginator; see pinax.api.pagination.CursorPaginator
+    paginator_class = None
+    # encodings for request and response bodies; the first is the default
+    codecs = DEFAULT_CODECS
+    response_codec = json_codec
+
     def dispatch(self, request, *args, **kwargs):
+        self.instrumentation = instrumentation = get_instrumentation(self)
+        self.memory = memory = get_memory_tracker(self)
+        self.response_codec = self.get_response_codec()
+        profiler = get_profiler(self)
+        chain = None
         try:
-            if request.method.lower() in self.http_method_names:
-                endpoint = getattr(self, request.method.lower(), self.http_method_not_allowed)
-            else:
-                endpoint = self.http_method_not_allowed
-            self.check_authentication(endpoint)
-            self.prepare()
-            self.check_permissions(endpoint)
-            response = endpoint(request, *args, **kwargs)
-            if not isinstance(response, HttpResponse):
+            name = self.get_endpoint_name(request)
+            self.endpoint = endpoint = getattr(self, name)
+            self.chain = chain = self.get_chain(name)
+            with instrumentation.phase("authentication"):
+                self.check_authentication(endpoint)
+            # started once the user is known; requested profiles are staff-only
+            profiler.start()
+            if chain.pre:
+                with instrumentation.phase("pre"):
+                    for hook in chain.pre:
+                        hook(request, self)
+            with instrumentation.phase("prepare"):
+                self.prepare()
+            with instrumentation.phase("permissions"):
+                self.check_permissions(endpoint)
+            with instrumentation.phase("endpoint"):
+                response = endpoint(request, *args, **kwargs)
+            if not isinstance(response, (HttpResponse, StreamingHttpResponse)):
                 raise ValueError("view did not return an HttpResponse (got: {})".format(type(response)))
         except Exception as exc:
             response = self.handle_exception(exc)
+        if chain is not None and chain.post:
+            try:
+                with instrumentation.phase("post"):
+                    for hook in chain.post:
+                        response = hook(request, self, response) or response
+            except Exception as exc:
+                response = self.handle_exception(exc)
+        if isinstance(response, Response) and response.codec is not self.response_codec:
+            response.set_codec(self.response_codec)
+        patch_vary_headers(response, ("Accept",))
+        profiler.finish(response)
+        memory.finish(response)
+        instrumentation.finish(response)
         return response
 
+    def get_endpoint_name(self, request):
+        """
+        Returns the name of the method handling `request`: the view
+        mapping's method (i.e. "list"), or the HTTP method for plain views.
+        Chains are keyed by this name rather than the endpoint's __name__,
+        which decorators may change.
+        """
+        verb = request.method.lower()
+        if verb in self.http_method_names:
+            for name in (getattr(self, "requested_method", None), verb):
+                if name and hasattr(self, name):
+                    return name
+        return "http_method_not_allowed"
+
     @property
     def debug(self):
         return settings.DEBUG or getattr(settings, "PINAX_API_DEBUG", False)
@@ -82,14 +215,21 @@ class EndpointSet(View):
     def prepare(self):
         pass
 
+    def get_endpoint_chain(self, endpoint):
+        """
+        Returns the Chain `dispatch()` compiled for `endpoint`, or builds one
+        when the checks are called for another endpoint or outside it.
+        """
+        chain = getattr(self, "chain", None)
+        if chain is None or endpoint is not getattr(self, "endpoint", None):
+            chain = Chain.from_endpoint(type(self), endpoint)
+        return chain
+
     def check_authentication(self, endpoint):
         user = None
-        backends = []
-        backends.extend(getattr(endpoint, "authentication", []))
-        backends.extend(getattr(self, "middleware", {}).get("authentication", []))
-        for backend in backends:
+        for backend in self.get_endpoint_chain(endpoint).authentication:
             try:
-                user = backend.authenticate(self.request)
+                user = authenticate(backend, self.request)
             except AuthenticationFailed as exc:
                 raise ErrorResponse(**self.error_response_kwargs(str(exc), status=401))
             if user:
@@ -99,11 +239,13 @@ class EndpointSet(View):
             if not self.request.user.is_authenticated():
                 raise ErrorResponse(**self.error_response_kwargs("Authentication Required.", status=401))
 
+    @property
+    def object_permissions(self):
+        chain = getattr(self, "chain", None)
+        return chain.object_permissions if chain is not None else []
+
     def check_permissions(self, endpoint):
-        perms = []
-        perms.extend(getattr(endpoint, "permissions", []))
-        perms.extend(getattr(self, "middleware", {}).get("permissions", []))
-        for perm in perms:
+        for perm in self.get_endpoint_chain(endpoint).permissions:
             res = perm(self.request, view=self)
             if res is None:
                 continue
@@ -114,71 +256,197 @@ class EndpointSet(View):
             if not ok:
                 raise ErrorResponse(**self.error_response_kwargs(msg, status=status))
 
+    def get_max_body_size(self):
+        if self.max_body_size is not None:
+            return self.max_body_size
+        return getattr(settings, "PINAX_API_MAX_BODY_SIZE", None)
+
+    def check_body_size(self):
+        """
+        Rejects requests declaring a Content-Length over the maximum body
+        size before any of the body is read.
+        """
+        max_size = self.get_max_body_size()
+        if max_size is None:
+            return
+        try:
+            length = int(self.request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > max_size:
+            raise ErrorResponse(**self.payload_too_large_kwargs(max_size))
+
+    def payload_too_large_kwargs(self, max_size):
+        return self.error_response_kwargs(
+            "Request body exceeds {} bytes.".format(max_size),
+            title="Payload Too Large",
+            status=413,
+        )
+
+    def get_response_codec(self):
+        return negotiate(self.request.META.get("HTTP_ACCEPT", ""), self.codecs)
+
+    def get_request_codec(self):
+        content_type = self.request.META.get("CONTENT_TYPE", "")
+        return find_codec(content_type, self.codecs) or self.codecs[0]
+
     def parse_data(self):
         # @@@ this method is not the most ideal implementation generally, but
         # until a better design comes along, we roll with it!
+        self.check_body_size()
+        codec = self.get_request_codec()
         try:
-            return json.loads(self.request.body.decode(settings.DEFAULT_CHARSET))
-        except json.JSONDecodeError as e:
+            return codec.loads(self.request.body, settings.DEFAULT_CHARSET)
+        except ValueError as e:
+            raise ErrorResponse(**self.error_response_kwargs(
+                str(e),
+                title="Invalid {}".format(codec.name),
+                status=400
+            ))
+
+    @contextlib.contextmanager
+    def parse_errors(self):
+        """
+        Converts errors raised while parsing a streamed body into
+        ErrorResponses.
+        """
+        try:
+            yield
+        except PayloadTooLarge:
+            raise ErrorResponse(**self.payload_too_large_kwargs(self.get_max_body_size()))
+        except ValueError as e:
             raise ErrorResponse(**self.error_response_kwargs(str(e), title="Invalid JSON", status=400))
 
+    def parse_data_stream(self):
+        """
+        Reads the request body incrementally, returning an iterator over
+        the elements of the "data" list.
+        """
+        self.check_body_size()
+        document = DocumentStream(
+            self.request,
+            encoding=settings.DEFAULT_CHARSET,
+            max_size=self.get_max_body_size(),
+        )
+        with self.parse_errors():
+            found = document.open()
+        if not found:
+            if "data" not in document.document:
+                raise ErrorResponse(**self.error_response_kwargs('Missing "data" key in payload.', status=400))
+            raise ErrorResponse(**self.error_response_kwargs("Data must be in a list.", status=400))
+
+        def elements():
+            with self.parse_errors():
+                for resource_data in document.elements():
+                    yield resource_data
+        return elements()
+
     @contextlib.contextmanager
-    def validate(self, resource_class, collection=False, obj=None):
+    def validate(self, resource_class, collection=False, obj=None, stream=False):
         """
         Generator yields either a validated resource (collection=False)
         or a resource generator callable (collection=True).
 
+        With `stream=True` a collection payload is parsed incrementally:
+        each element of "data" is read and validated only as the generator
+        is consumed, so errors may surface after earlier resources were
+        handled.
+
         ValidationError exceptions resulting from subsequent (after yield)
         resource manipulation cause an immediate ErrorResponse.
         """
-        data = self.parse_data()
-        if "data" not in data:
-            raise ErrorResponse(**self.error_response_kwargs('Missing "data" key in payload.', status=400))
+        if stream and self.get_request_codec() is not json_codec:
+            # only JSON bodies are parsed incrementally
+            stream = False
+        if collection and stream:
+            items = self.parse_data_stream()
+        else:
+            data = self.parse_data()
+            if "data" not in data:
+                raise ErrorResponse(**self.error_response_kwargs('Missing "data" key in payload.', status=400))
 
-        if collection and not isinstance(data["data"], list):
-            raise ErrorResponse(**self.error_response_kwargs("Data must be in a list.", status=400))
+            if collection and not isinstance(data["data"], list):
+                raise ErrorResponse(**self.error_response_kwargs("Data must be in a list.", status=400))
+            items = data["data"]
+            if collection:
+                # reject the whole payload, listing every error, before any resource is built
+                self.check_resource_data(resource_class, items, collection=True)
 
         try:
-            if collection:
-                yield (self.validate_resource(resource_class, resource_data, obj) for resource_data in data["data"])
+            if collection and stream:
+                yield (
+                    self.validate_resource(resource_class, resource_data, obj, pointer="/data/{}".format(i))
+                    for i, resource_data in enumerate(items)
+                )
+            elif collection:
+                yield (self.populate_resource(resource_class, resource_data, obj) for resource_data in items)
             else:
-                yield self.validate_resource(resource_class, data["data"], obj)
+                yield self.validate_resource(resource_class, items, obj)
         except ValidationError as exc:
             raise ErrorResponse(
                 TopLevel.from_validation_error(exc, resource_class).serializable(),
                 status=400,
             )
 
-    def validate_resource(self, resource_class, resource_data, obj=None):
+    def check_resource_data(self, resource_class, resource_data, pointer="/data", collection=False):
+        """
+        Checks resource data (a list of resource objects if `collection`)
+        against the compiled schema of `resource_class`, raising a single
+        ErrorResponse which lists every error.
+        """
+        schema = compile_schema(resource_class)
+        if collection:
+            errors = []
+            for i, item in enumerate(resource_data):
+                errors.extend(schema.errors(item, "{}/{}".format(pointer, i)))
+        else:
+            errors = schema.errors(resource_data, pointer)
+        if errors:
+            raise ErrorResponse(TopLevel(errors=errors).serializable(), status=400)
+
+    def validate_resource(self, resource_class, resource_data, obj=None, pointer="/data"):
         """
         Validates resource data for a resource class.
         """
-        if "attributes" not in resource_data:
-            raise ErrorResponse(**self.error_response_kwargs('Missing "attributes" key in data.', status=400))
+        self.check_resource_data(resource_class, resource_data, pointer)
+        return self.populate_resource(resource_class, resource_data, obj)
+
+    def populate_resource(self, resource_class, resource_data, obj=None):
         resource = resource_class()
         resource.populate(resource_data, obj=obj)
         return resource
 
     def render(self, resource, **kwargs):
-        try:
-            payload = self.create_top_level(resource, **kwargs).serializable(request=self.request)
-        except SerializationError as exc:
-            return self.render_error(str(exc), status=400)
-        else:
-            return Response(payload, status=200)
+        return self.render_top_level(resource, status=200, **kwargs)
 
     def render_create(self, resource, **kwargs):
+        res = self.render_top_level(resource, status=201, **kwargs)
+        if res.status_code == 201:
+            res["Location"] = resource.get_self_link(request=self.request)
+        return res
+
+    def render_top_level(self, resource, status, **kwargs):
         try:
-            payload = self.create_top_level(resource, **kwargs).serializable(request=self.request)
+            top_level = self.create_top_level(resource, **kwargs)
+            with self.instrumentation.phase("serialize"), self.memory.phase("serialize"):
+                payload = top_level.serializable(request=self.request)
+            with self.instrumentation.phase("encode"), self.memory.phase("encode"):
+                res = Response(payload, status=status, codec=self.response_codec)
+                res.encode()
+                self.memory.check()
         except SerializationError as exc:
             return self.render_error(str(exc), status=400)
-        else:
-            res = Response(payload, status=201)
-            res["Location"] = resource.get_self_link(request=self.request)
-            return res
+        except MemoryBudgetExceeded as exc:
+            logger.warning(str(exc))
+            return self.render_error(
+                "The response is too large; request fewer resources.",
+                title="Memory Budget Exceeded",
+                status=getattr(settings, "PINAX_API_MEMORY_BUDGET_STATUS", 500),
+            )
+        return res
 
     def render_delete(self):
-        return Response({}, status=204)
+        return Response({}, status=204, codec=self.response_codec)
 
     def error_response_kwargs(self, message, title=None, status=400, extra=None):
         if extra is None:
@@ -205,21 +473,90 @@ class EndpointSet(View):
             raise Http404("{} does not exist.".format(qs.model._meta.verbose_name.capitalize()))
 
     def create_top_level(self, resource, linkage=False, **kwargs):
+        if isinstance(resource, QuerySet):
+            resource = self.sort_queryset(self.filter_queryset(resource))
         kwargs.update(
             {
                 "data": resource,
                 "links": True,
                 "linkage": linkage,
+                "per_page": self.page_size,
+                "max_per_page": self.max_page_size,
+                "allow_unpaginated": self.allow_unpaginated,
+                "paginator_class": self.paginator_class,
+                "memory": self.memory if self.memory.enabled else None,
             }
         )
+        if self.object_permissions:
+            kwargs["object_filter"] = self.filter_resources
+            if isinstance(resource, QuerySet):
+                # filter_objects() runs on each page after pagination
+                kwargs["exact_count"] = not any(overrides(perm, "filter_objects") for perm in self.object_permissions)
         if "include" in self.request.GET:
-            kwargs["included"] = Included(self.request.GET["include"].split(","))
+            # validated up front so invalid paths are rejected before any query runs
+            resource_class = resource_class_of(resource) or getattr(self, "resource_class", None)
+            if resource_class is None:
+                raise SerializationError("include is not supported by this endpoint")
+            kwargs["included"] = Included(parse_include(resource_class, self.request.GET["include"]))
         return TopLevel(**kwargs)
 
+    def filter_queryset(self, qs):
+        """
+        Restricts `qs` in SQL using object permissions.
+        """
+        for perm in self.object_permissions:
+            qs = perm.filter_queryset(self.request, qs, self)
+        return qs
+
+    def filter_resources(self, resources, queryset=False):
+        """
+        Returns the resources whose objects pass object permissions. Each
+        permission is called once per model rather than once per object.
+        `queryset=True` marks resources already restricted by
+        `filter_queryset()`, so only batch `filter_objects()` checks remain.
+        """
+        perms = self.object_permissions
+        if queryset:
+            perms = [perm for perm in perms if overrides(perm, "filter_objects")]
+        if not perms:
+            return resources
+        resources = list(resources)
+        groups = collections.OrderedDict()
+        for resource in resources:
+            groups.setdefault(type(resource.obj), []).append(resource.obj)
+        allowed = set()
+        for objs in groups.values():
+            for perm in perms:
+                objs = perm.filter_objects(self.request, objs, self)
+            allowed.update(id(obj) for obj in objs)
+        return [resource for resource in resources if id(resource.obj) in allowed]
+
+    def sort_queryset(self, qs):
+        """
+        Applies the `sort` query parameter to `qs`. Collections are always
+        ordered (by primary key when unsorted) so pages are stable.
+        """
+        if "sort" in self.request.GET:
+            resource_class = getattr(self, "resource_class", None)
+            if resource_class is None:
+                raise SerializationError("sort is not supported by this endpoint")
+            return qs.order_by(*resource_class.get_ordering(self.request.GET["sort"]))
+        if not qs.ordered:
+            return qs.order_by("pk")
+        return qs
+
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+
 
 class ResourceEndpointSet(EndpointSet):
 
     parent = None
+    # serve whole collections as NDJSON to clients asking for it
+    allow_stream = False
+    # resources read per query when streaming a collection as NDJSON;
+    # None uses PINAX_API_STREAM_CHUNK_SIZE
+    stream_chunk_size = None
 
     @classmethod
     def view_mapping(cls, collection):
@@ -254,6 +591,53 @@ class ResourceEndpointSet(EndpointSet):
             urls.extend(endpointset.as_urls(cls.url, related_name))
         return urls
 
+    def render(self, resource, **kwargs):
+        if isinstance(resource, QuerySet) and self.wants_stream():
+            return self.render_stream(resource)
+        return super(ResourceEndpointSet, self).render(resource, **kwargs)
+
+    def wants_stream(self):
+        """
+        True when the endpointset sets `allow_stream` and the client asked
+        for a collection as NDJSON, with `?format=ndjson` or an
+        `Accept: application/x-ndjson` header.
+        """
+        if not self.allow_stream:
+            return False
+        if self.request.GET.get("format") == "ndjson":
+            return True
+        accept = self.request.META.get("HTTP_ACCEPT", "")
+        return any(q > 0 and media_type in NDJSON_MEDIA_TYPES for media_type, q in parse_accept(accept))
+
+    def get_stream_chunk_size(self):
+        if self.stream_chunk_size is not None:
+            return self.stream_chunk_size
+        return getattr(settings, "PINAX_API_STREAM_CHUNK_SIZE", 1000)
+
+    def render_stream(self, qs):
+        """
+        Streams every resource of `qs` as newline-delimited JSON, one
+        resource object per line. The same filtering, sorting and object
+        permissions as the paginated output apply, but the collection is
+        read in chunks of `get_stream_chunk_size()` rather than pages.
+        """
+        if "include" in self.request.GET:
+            return self.render_error("include is not supported for NDJSON output.", status=400)
+        try:
+            qs = self.sort_queryset(self.filter_queryset(qs))
+        except SerializationError as exc:
+            return self.render_error(str(exc), status=400)
+        return StreamingHttpResponse(self.stream_lines(qs), content_type=NDJSON_MEDIA_TYPES[0])
+
+    def stream_lines(self, qs):
+        request = self.request
+        for chunk in iterate_chunks(qs, self.get_stream_chunk_size()):
+            if self.object_permissions:
+                chunk = self.filter_resources(chunk, queryset=True)
+            lines = [json_codec.dumps(resource.serializable(links=True, request=request)) for resource in chunk]
+            lines.append(b"")
+            yield b"\n".join(lines)
+
 
 class RelationshipEndpointSet(EndpointSet):
 
@@ -16,3 +16,21 @@ class SerializationError(Exception):
 
 class AuthenticationFailed(Exception):
     pass
+
+
+class NPlusOneWarning(RuntimeWarning):
+    pass
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+class MemoryBudgetExceeded(Exception):
+
+    def __init__(self, used, budget):
+        self.used = used
+        self.budget = budget
+        super(MemoryBudgetExceeded, self).__init__(
+            "Rendering needed more than {} bytes of memory (used {}).".format(budget, used)
+        )
@@ -0,0 +1,152 @@
+from __future__ import unicode_literals
+
+import gzip
+import io
+import json
+import os
+import re
+
+from django.core.urlresolvers import get_resolver
+
+from .encoders import json_codec
+from .registry import registry
+
+
+FORMATS = {
+    "ndjson": "ndjson",
+    "jsonapi": "json",
+}
+
+
+def get_resource_class(api_type):
+    """
+    Returns the (bound) resource class registered for `api_type`. The
+    URLconf is imported first since binding happens when endpointsets are
+    defined.
+    """
+    get_resolver().url_patterns
+    try:
+        resource_class = registry[api_type]
+    except KeyError:
+        raise LookupError('No resource is registered for "{}".'.format(api_type))
+    if not hasattr(resource_class, "model"):
+        raise LookupError('Resource "{}" has no model to export.'.format(api_type))
+    return resource_class
+
+
+def pk_ranges(qs, chunk_size):
+    """
+    Splits `qs` into `[low, high)` primary key ranges of `chunk_size`
+    objects each; the last range has no upper bound. Only primary keys are
+    read to find the boundaries.
+    """
+    bounds = []
+    for i, pk in enumerate(qs.order_by("pk").values_list("pk", flat=True).iterator()):
+        if i % chunk_size == 0:
+            bounds.append(pk)
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+class Export(object):
+    """
+    Chunked export of every resource of one type to a directory. The chunk
+    ranges are fixed in a manifest on the first run so an interrupted
+    export resumes with the chunks whose files are missing.
+    """
+
+    def __init__(self, api_type, directory, format="ndjson", compress=True, chunk_size=10000):
+        if format not in FORMATS:
+            raise ValueError('Unknown export format "{}".'.format(format))
+        self.api_type = api_type
+        self.directory = directory
+        self.format = format
+        self.compress = compress
+        self.chunk_size = chunk_size
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, "{}.manifest.json".format(self.api_type))
+
+    def chunk_path(self, index):
+        name = "{}-{:05d}.{}".format(self.api_type, index, FORMATS[self.format])
+        if self.compress:
+            name += ".gz"
+        return os.path.join(self.directory, name)
+
+    def options(self):
+        return {
+            "api_type": self.api_type,
+            "format": self.format,
+            "compress": self.compress,
+            "chunk_size": self.chunk_size,
+        }
+
+    def load_ranges(self, restart=False):
+        """
+        Returns the chunk ranges from the manifest, computing and saving
+        them when there is no manifest (or `restart` is set). Raises
+        ValueError if the manifest was written with other options.
+        """
+        if not restart and os.path.exists(self.manifest_path):
+            with io.open(self.manifest_path, encoding="utf-8") as fp:
+                manifest = json.load(fp)
+            if manifest["options"] != self.options():
+                raise ValueError("{} was written with different options; restart the export.".format(self.manifest_path))
+            return [tuple(r) for r in manifest["ranges"]]
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        resource_class = get_resource_class(self.api_type)
+        ranges = pk_ranges(resource_class.model._default_manager.all(), self.chunk_size)
+        # chunk files of an earlier run do not match the new ranges
+        chunk_name = re.compile(r"^{}-\d{{5}}\.".format(re.escape(self.api_type)))
+        for name in os.listdir(self.directory):
+            if chunk_name.match(name):
+                os.remove(os.path.join(self.directory, name))
+        with io.open(self.manifest_path, "w", encoding="utf-8") as fp:
+            fp.write(json.dumps({"options": self.options(), "ranges": ranges}, sort_keys=True, default=str))
+        return ranges
+
+    def pending(self, ranges):
+        """
+        Returns `(export, index, low, high)` tasks for the chunks not yet
+        written.
+        """
+        return [
+            (self, index, low, high)
+            for index, (low, high) in enumerate(ranges)
+            if not os.path.exists(self.chunk_path(index))
+        ]
+
+    def write_chunk(self, index, low, high):
+        """
+        Serializes the resources in `[low, high)` into the chunk file and
+        returns how many were written. The file is renamed into place when
+        complete, so a missing file always means an unfinished chunk.
+        """
+        resource_class = get_resource_class(self.api_type)
+        qs = resource_class.model._default_manager.filter(pk__gte=low)
+        if high is not None:
+            qs = qs.filter(pk__lt=high)
+        path = self.chunk_path(index)
+        tmp_path = path + ".tmp"
+        opener = gzip.open if self.compress else io.open
+        count = 0
+        with opener(tmp_path, "wb") as fp:
+            if self.format == "jsonapi":
+                fp.write(b'{"jsonapi": {"version": "1.0"}, "data": [')
+            for resource in resource_class.from_queryset(qs.order_by("pk")).iterator():
+                content = json_codec.dumps(resource.serializable(links=True))
+                if self.format == "jsonapi":
+                    fp.write(b", " + content if count else content)
+                else:
+                    fp.write(content + b"\n")
+                count += 1
+            if self.format == "jsonapi":
+                fp.write(b"]}")
+        os.rename(tmp_path, path)
+        return count
+
+
+def run_task(task):
+    export, index, low, high = task
+    return index, export.write_chunk(index, low, high)
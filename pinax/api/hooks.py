@@ -0,0 +1,24 @@
+from __future__ import unicode_literals
+
+
+def pre(hooks):
+    """
+    Hooks called as `hook(request, endpointset)` after authentication and
+    before `prepare()`. Raise `ErrorResponse` to reject the request.
+    """
+    def decorator(func):
+        func.pre = hooks
+        return func
+    return decorator
+
+
+def post(hooks):
+    """
+    Hooks called as `hook(request, endpointset, response)` with the final
+    response (including error responses). A hook may return a replacement
+    response; returning None keeps the current one.
+    """
+    def decorator(func):
+        func.post = hooks
+        return func
+    return decorator
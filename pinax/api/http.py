@@ -1,15 +1,46 @@
 from __future__ import unicode_literals
 
-import json
-
 from django.http.response import HttpResponse, HttpResponseRedirectBase
 
+from .encoders import json_codec
+
 
 class Response(HttpResponse):
+    """
+    JSON:API document response. `data` is encoded with `codec` (JSON by
+    default) when the content is first needed, so content negotiation can
+    still pick the encoding after the response was built.
+    """
 
     def __init__(self, data, *args, **kwargs):
-        super(Response, self).__init__(content=json.dumps(data), *args, **kwargs)
-        self["Content-Type"] = "application/vnd.api+json"
+        codec = kwargs.pop("codec", json_codec)
+        super(Response, self).__init__(*args, **kwargs)
+        self.data = data
+        self.set_codec(codec)
+
+    def set_codec(self, codec):
+        self.codec = codec
+        self.encoded = False
+        self["Content-Type"] = codec.media_type
+
+    def encode(self):
+        if not self.encoded:
+            HttpResponse.content.fset(self, self.codec.dumps(self.data))
+            self.encoded = True
+
+    @property
+    def content(self):
+        self.encode()
+        return HttpResponse.content.fget(self)
+
+    @content.setter
+    def content(self, value):
+        HttpResponse.content.fset(self, value)
+        self.encoded = True
+
+    def __iter__(self):
+        self.encode()
+        return super(Response, self).__iter__()
 
 
 class Redirect(HttpResponseRedirectBase):
@@ -0,0 +1,216 @@
+from __future__ import unicode_literals
+
+import contextlib
+import logging
+import socket
+
+from collections import OrderedDict
+from timeit import default_timer
+
+from django.conf import settings
+from django.db import connections
+from django.utils import lru_cache, six
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class NullPhase(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class NullInstrumentation(object):
+    """
+    Stand-in used when instrumentation is disabled. Every hook is a no-op
+    so the uninstrumented request path costs a couple of attribute lookups.
+    """
+
+    enabled = False
+    null_phase = NullPhase()
+
+    def phase(self, name):
+        return self.null_phase
+
+    def finish(self, response):
+        pass
+
+
+null_instrumentation = NullInstrumentation()
+
+
+class QueryCounter(object):
+    """
+    Counts queries executed on all database connections between
+    `__enter__` and `__exit__`, using each connection's query log.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self._marks = []
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._marks.append((connection, connection.force_debug_cursor, len(connection.queries_log)))
+            connection.force_debug_cursor = True
+        return self
+
+    def __exit__(self, *exc_info):
+        for connection, force_debug_cursor, mark in self._marks:
+            executed = list(connection.queries_log)[mark:]
+            self.count += len(executed)
+            self.time += sum(float(query["time"]) for query in executed) * 1000
+            connection.force_debug_cursor = force_debug_cursor
+        self._marks = []
+
+
+class Instrumentation(object):
+    """
+    Records per-phase timings (in milliseconds) and database query counts
+    for a single EndpointSet request. Timings are exclusive: time spent in
+    a nested phase (i.e. "serialize" inside "endpoint") is only counted for
+    the nested phase, so the timings add up to no more than the total.
+    """
+
+    enabled = True
+
+    def __init__(self, endpointset):
+        self.endpointset = endpointset
+        self.timings = OrderedDict()
+        self.total = None
+        self.response = None
+        self._nested = []  # time spent in phases nested in each open phase
+        self._queries = QueryCounter().__enter__()
+        self._start = default_timer()
+
+    @property
+    def queries(self):
+        return self._queries.count
+
+    @property
+    def query_time(self):
+        return self._queries.time
+
+    @property
+    def name(self):
+        return self.endpointset.__class__.__name__
+
+    @property
+    def method(self):
+        return getattr(self.endpointset, "requested_method", None) or self.endpointset.request.method.lower()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = default_timer()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = (default_timer() - start) * 1000
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - nested
+
+    def finish(self, response):
+        self.total = (default_timer() - self._start) * 1000
+        self.response = response
+        self._queries.__exit__(None, None, None)
+        if getattr(settings, "PINAX_API_SERVER_TIMING", True):
+            response["Server-Timing"] = self.server_timing()
+        for sink in get_sinks(tuple(getattr(settings, "PINAX_API_INSTRUMENTATION_SINKS", DEFAULT_SINKS))):
+            sink.emit(self)
+
+    def server_timing(self):
+        metrics = ["{};dur={:.3f}".format(name, duration) for name, duration in self.timings.items()]
+        metrics.append('db;dur={:.3f};desc="{} queries"'.format(self.query_time, self.queries))
+        metrics.append("total;dur={:.3f}".format(self.total))
+        return ", ".join(metrics)
+
+
+def get_instrumentation(endpointset):
+    if getattr(settings, "PINAX_API_INSTRUMENTATION", False):
+        return Instrumentation(endpointset)
+    return null_instrumentation
+
+
+DEFAULT_SINKS = ["pinax.api.instrumentation.LoggingSink"]
+
+
+@lru_cache.lru_cache(maxsize=None)
+def get_sinks(sinks):
+    """
+    Resolves PINAX_API_INSTRUMENTATION_SINKS entries (dotted paths or sink
+    instances) once per distinct setting value.
+    """
+    resolved = []
+    for sink in sinks:
+        if isinstance(sink, six.string_types):
+            sink = import_string(sink)()
+        resolved.append(sink)
+    return resolved
+
+
+class LoggingSink(object):
+
+    def __init__(self, logger=logger, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def emit(self, instrumentation):
+        self.logger.log(
+            self.level,
+            "{}.{} status={} total={:.3f}ms queries={} db={:.3f}ms {}".format(
+                instrumentation.name,
+                instrumentation.method,
+                instrumentation.response.status_code,
+                instrumentation.total,
+                instrumentation.queries,
+                instrumentation.query_time,
+                " ".join("{}={:.3f}ms".format(k, v) for k, v in instrumentation.timings.items()),
+            )
+        )
+
+
+class StatsdSink(object):
+    """
+    Sends timings and query counts to a statsd-compatible daemon over UDP.
+    Send failures are ignored; metrics must never break a request.
+    """
+
+    def __init__(self, host=None, port=None, prefix=None):
+        self.host = host if host is not None else getattr(settings, "PINAX_API_STATSD_HOST", "127.0.0.1")
+        self.port = port if port is not None else getattr(settings, "PINAX_API_STATSD_PORT", 8125)
+        self.prefix = prefix if prefix is not None else getattr(settings, "PINAX_API_STATSD_PREFIX", "pinax_api")
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def emit(self, instrumentation):
+        key = "{}.{}.{}".format(self.prefix, instrumentation.name, instrumentation.method)
+        metrics = ["{}.{}:{:.3f}|ms".format(key, name, duration) for name, duration in instrumentation.timings.items()]
+        metrics.append("{}.total:{:.3f}|ms".format(key, instrumentation.total))
+        metrics.append("{}.queries:{}|g".format(key, instrumentation.queries))
+        try:
+            self.socket.sendto("\n".join(metrics).encode("ascii"), (self.host, self.port))
+        except socket.error:
+            pass
+
+
+class MemorySink(object):
+    """
+    Keeps finished instrumentation in memory; intended for tests.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, instrumentation):
+        self.records.append(instrumentation)
@@ -1,26 +1,63 @@
 from __future__ import unicode_literals
 
+import collections
+import warnings
+
 try:
     from collections import abc
 except ImportError:
     import collections as abc
 
-from django.core.paginator import Paginator
-from django.utils.six.moves.urllib.parse import (
-    urlparse, parse_qs, urlencode, ParseResult
-)
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models.query import QuerySet
+from django.utils.http import urlencode
 
+from .exceptions import NPlusOneWarning, SerializationError
+from .instrumentation import QueryCounter
 from .resource import Resource
 
 
 PAGINATOR_PER_PAGE = 100  # default number of items shown per page
+PAGINATOR_MAX_PER_PAGE = 1000  # default upper bound for page[size]
+PAGE_POSITION_PARAMS = ("page[number]", "page[cursor]")  # replaced in pagination links
+
+
+class Included(object):
+    """
+    Resources collected for the compound document `included` member, keyed
+    by identifier in the order they were first reached. Primary resources
+    are excluded, as JSON:API forbids repeating them in `included`.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.resources = collections.OrderedDict()
+        self.primary = set()
+        # (identifier, subtree) pairs whose includes were already resolved
+        self.resolved = set()
+
+    def add(self, resource):
+        self.resources.setdefault(resource.identifier, resource)
+
+    def add_primary(self, resource):
+        self.primary.add(resource.identifier)
+
+    def __contains__(self, resource):
+        return resource.identifier in self.resources and resource.identifier not in self.primary
+
+    def __iter__(self):
+        for identifier, resource in self.resources.items():
+            if identifier not in self.primary:
+                yield resource
 
+    def __len__(self):
+        return sum(1 for _ in self)
 
-class Included(set):
+    def __bool__(self):
+        return any(True for _ in self)
 
-    def __init__(self, paths):
-        self.paths = paths
-        super(Included, self).__init__()
+    __nonzero__ = __bool__
 
 
 class TopLevel:
@@ -46,13 +83,31 @@ class TopLevel:
                 errs.append(err)
         return cls(errors=errs)
 
-    def __init__(self, data=None, errors=None, links=False, included=None, meta=None, linkage=False):
+    def __init__(self, data=None, errors=None, links=False, included=None, meta=None, linkage=False, object_filter=None,
+                 per_page=None, max_per_page=None, allow_unpaginated=False, memory=None,
+                 exact_count=True, paginator_class=None):
         self.data = data
         self.errors = errors
         self.links = links
         self.included = included
         self.meta = meta if meta else {}
         self.linkage = linkage
+        self.object_filter = object_filter
+        if per_page is None:
+            per_page = getattr(settings, "PINAX_API_PAGE_SIZE", PAGINATOR_PER_PAGE)
+        if max_per_page is None:
+            max_per_page = getattr(settings, "PINAX_API_MAX_PAGE_SIZE", PAGINATOR_MAX_PER_PAGE)
+        self.per_page = per_page
+        self.max_per_page = max_per_page
+        self.allow_unpaginated = allow_unpaginated
+        # Django's Paginator, or any class taking the same arguments whose
+        # `page_param` names the query parameter selecting the page
+        self.paginator_class = Paginator if paginator_class is None else paginator_class
+        # False when `object_filter` drops items from a page after
+        # pagination, so row counts would include resources not shown
+        self.exact_count = exact_count
+        # checked after each resource; see pinax.api.memory.MemoryTracker
+        self.memory = memory
 
         # internal state
         self._current_page = None
@@ -62,17 +117,27 @@ class TopLevel:
             ret = []
             data = self.data
             if request is not None:
-                per_page, page_number = self.get_pagination_values(request)
-                paginator = Paginator(data, per_page)
-                self._current_page = data = paginator.page(page_number)
-
-                # Obtain pagination meta-data
-                paginator = dict(paginator=dict(
-                    count=paginator.count,
-                    num_pages=paginator.num_pages
-                ))
-                self.meta.update(paginator)
+                per_page, position = self.get_pagination_values(request)
+            else:
+                per_page = None
+            if per_page is not None:
+                paginator = self.paginator_class(data, per_page)
+                try:
+                    self._current_page = data = paginator.page(position)
+                except InvalidPage as exc:
+                    raise SerializationError(str(exc))
 
+                # Obtain pagination meta-data; cursor paginators have no count
+                if self.exact_count and hasattr(paginator, "num_pages"):
+                    self.meta.update(dict(paginator=dict(
+                        count=paginator.count,
+                        num_pages=paginator.num_pages
+                    )))
+
+            if self.object_filter is not None:
+                data = self.object_filter(data, queryset=isinstance(self.data, QuerySet))
+            if self.debug:
+                return self.get_serializable_items_checked(data, request)
             for x in data:
                 ret.append(x.serializable(
                     links=self.links,
@@ -80,6 +145,7 @@ class TopLevel:
                     included=self.included,
                     request=request,
                 ))
+                self.check_memory()
             return ret
         elif isinstance(self.data, Resource):
             return self.data.serializable(
@@ -91,28 +157,104 @@ class TopLevel:
         else:
             return self.data
 
+    @property
+    def debug(self):
+        return settings.DEBUG or getattr(settings, "PINAX_API_DEBUG", False)
+
+    def get_serializable_items_checked(self, data, request=None):
+        """
+        Debug-mode variant of collection serialization which warns when
+        serializing individual resources issues queries (an N+1 pattern
+        usually fixed with select_related() or prefetch_related()).
+        """
+        ret, offenders, queries = [], [], 0
+        for x in data:
+            with QueryCounter() as context:
+                ret.append(x.serializable(
+                    links=self.links,
+                    linkage=self.linkage,
+                    included=self.included,
+                    request=request,
+                ))
+            self.check_memory()
+            if len(context):
+                offenders.append(x)
+                queries += len(context)
+        if len(offenders) > 1:
+            warnings.warn(
+                "{} of {} \"{}\" resources issued {} queries while serializing; "
+                "consider select_related() or prefetch_related()".format(
+                    len(offenders),
+                    len(ret),
+                    offenders[0].api_type,
+                    queries,
+                ),
+                NPlusOneWarning,
+            )
+        return ret
+
+    def get_serializable_included(self, included, request=None):
+        ret = []
+        for r in included:
+            ret.append(r.serializable(links=self.links, request=request))
+            self.check_memory()
+        return ret
+
+    def check_memory(self):
+        if self.memory is not None:
+            self.memory.check()
+
     def get_pagination_values(self, request):
+        """
+        Returns `(per_page, position)` from the `page[size]` and
+        `page[number]` query parameters, or the paginator's own `page_param`
+        (i.e. `page[cursor]`) whose value is then passed through as is.
+        `per_page` is None when the client disabled pagination with
+        `page[size]=0`, which is only accepted if `allow_unpaginated` is set.
+        Raises SerializationError for invalid values.
+        """
+        per_page = self.per_page
         if "page[size]" in request.GET:
-            try:
-                per_page = int(request.GET.get("page[size]", str(PAGINATOR_PER_PAGE)))
-            except ValueError:
-                per_page = PAGINATOR_PER_PAGE
-        else:
-            per_page = PAGINATOR_PER_PAGE
-        if per_page == 0:
-            # Zero is invalid number of items per page.
-            # Protect against Django division by zero error.
-            per_page = PAGINATOR_PER_PAGE
-
+            per_page = parse_page_param(request.GET, "page[size]")
+            if per_page == 0:
+                if not self.allow_unpaginated:
+                    raise SerializationError("page[size] must be a positive integer")
+                return None, 1
+            if per_page > self.max_per_page:
+                raise SerializationError("page[size] must not exceed {}".format(self.max_per_page))
+        page_param = getattr(self.paginator_class, "page_param", "page[number]")
+        if page_param != "page[number]":
+            return per_page, request.GET.get(page_param)
+        page_number = 1
         if "page[number]" in request.GET:
-            try:
-                page_number = int(request.GET.get("page[number]", "1"))
-            except ValueError:
-                page_number = 1
-        else:
-            page_number = 1
+            page_number = parse_page_param(request.GET, "page[number]")
+            if page_number < 1:
+                raise SerializationError("page[number] must be a positive integer")
         return per_page, page_number
 
+    def get_page_links(self, page):
+        """
+        Returns an OrderedDict mapping pagination link names to the query
+        parameters selecting that page. Pages exposing `next_cursor` and
+        `previous_cursor` get cursor links; numbered pages also get
+        `first`, and `last` when `exact_count` is set.
+        """
+        links = collections.OrderedDict()
+        if hasattr(page, "next_cursor"):
+            if page.previous_cursor is not None:
+                links["prev"] = {"page[cursor]": page.previous_cursor}
+            if page.next_cursor is not None:
+                links["next"] = {"page[cursor]": page.next_cursor}
+            return links
+        links["first"] = {"page[number]": 1}
+        if page.has_previous():
+            links["prev"] = {"page[number]": page.previous_page_number()}
+        if page.has_next():
+            links["next"] = {"page[number]": page.next_page_number()}
+        if self.exact_count:
+            links["last"] = {"page[number]": page.paginator.num_pages}
+        return links
+
     def build_links(self, request=None):
         links = {}
         if request is not None:
@@ -122,30 +264,16 @@ class TopLevel:
                 links["self"] = request.path
             page = self._current_page
             if page is not None:
-                if page.has_previous():
-                    u = urlparse(links["self"])
-                    q = parse_qs(u.query)
-                    q["page[number]"] = str(page.previous_page_number())
-                    links["prev"] = ParseResult(
-                        u.scheme,
-                        u.netloc,
-                        u.path,
-                        u.params,
-                        urlencode(q),
-                        u.fragment,
-                    ).geturl()
-                if page.has_next():
-                    u = urlparse(links["self"])
-                    q = parse_qs(u.query)
-                    q["page[number]"] = str(page.next_page_number())
-                    links["next"] = ParseResult(
-                        u.scheme,
-                        u.netloc,
-                        u.path,
-                        u.params,
-                        urlencode(q),
-                        u.fragment,
-                    ).geturl()
+                # other query parameters (filters, sort, page size...) are
+                # encoded once and shared by every pagination link
+                query = urlencode([
+                    (key, value)
+                    for key, value in query_items(request.GET)
+                    if key not in PAGE_POSITION_PARAMS
+                ])
+                prefix = "{}?{}".format(links["self"], query + "&" if query else "")
+                for name, params in self.get_page_links(page).items():
+                    links[name] = prefix + urlencode(list(params.items()))
         return links
 
     def serializable(self, request=None):
@@ -155,9 +283,32 @@ class TopLevel:
         if self.errors is not None:
             res.update(dict(errors=self.errors))
         if self.included:
-            res.update(dict(included=[r.serializable(links=self.links, request=request) for r in self.included]))
+            included = self.included
+            if self.object_filter is not None:
+                included = self.object_filter(included)
+            res.update(dict(included=self.get_serializable_included(included, request=request)))
         if self.meta:
             res.update(dict(meta=self.meta))
         if self.links:
             res.update(dict(links=self.build_links(request=request)))
         return res
+
+
+def query_items(query):
+    """
+    Returns `(key, value)` pairs of a QueryDict (or plain dict) in order,
+    including every value of repeated keys.
+    """
+    if hasattr(query, "lists"):
+        return [(key, value) for key, values in query.lists() for value in values]
+    return list(query.items())
+
+
+def parse_page_param(query, name):
+    try:
+        value = int(query[name])
+    except (TypeError, ValueError):
+        raise SerializationError("{} must be an integer".format(name))
+    if value < 0:
+        raise SerializationError("{} must be a positive integer".format(name))
+    return value
@@ -0,0 +1,232 @@
+from __future__ import unicode_literals
+
+import codecs
+import json
+import re
+
+from .exceptions import PayloadTooLarge
+
+
+WHITESPACE = " \t\n\r"
+
+STRUCTURE = re.compile(r'["\[\]{}]')
+STRING_END = re.compile(r'["\\]')
+SCALAR = re.compile(r"[-+.0-9a-zA-Z]*")
+UNEXPECTED = re.compile(r"[^-+.0-9a-zA-Z,:\s]")
+OPENING = {"]": "[", "}": "{"}
+
+
+class Scanner(object):
+    """
+    Finds where a JSON value ends without decoding it, keeping its state
+    (open brackets, strings and escapes) between chunks so each character
+    is looked at once however many reads the value spans. Brackets that do
+    not match and characters that cannot appear in JSON raise ValueError as
+    soon as they are seen.
+    """
+
+    def __init__(self, first):
+        self.scalar = first not in '"[{'
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text, i=0):
+        """
+        Scans `text` from `i`; returns the index just past the value, or
+        None if it continues in the next chunk.
+        """
+        if self.scalar:
+            end = SCALAR.match(text, i).end()
+            return end if end < len(text) else None
+        while i is not None and i < len(text):
+            if self.escape:
+                self.escape = False
+                i += 1
+            else:
+                i = (self.feed_string if self.in_string else self.feed_structure)(text, i)
+                if i is not None and not self.in_string and not self.stack:
+                    return i
+        return None
+
+    def feed_string(self, text, i):
+        match = STRING_END.search(text, i)
+        if match is None:
+            return None
+        if match.group() == "\\":
+            self.escape = True
+        else:
+            self.in_string = False
+        return match.end()
+
+    def feed_structure(self, text, i):
+        match = STRUCTURE.search(text, i)
+        bad = UNEXPECTED.search(text, i, match.start() if match else len(text))
+        if bad is not None:
+            raise ValueError("Unexpected {!r} in JSON data".format(bad.group()))
+        if match is None:
+            return None
+        char = match.group()
+        if char == '"':
+            self.in_string = True
+        elif char in "[{":
+            self.stack.append(char)
+        elif not self.stack or self.stack.pop() != OPENING[char]:
+            raise ValueError("Unexpected {!r} in JSON data".format(char))
+        return match.end()
+
+
+class DocumentStream(object):
+    """
+    Incrementally parses a JSON object from a file-like `stream`, handing
+    out the elements of its top-level "data" list one at a time so a large
+    collection is never held in memory as raw bytes, text and a Python tree
+    at once.
+
+    Call `.open()` to parse up to the "data" member, then iterate
+    `.elements()`. Other top-level members are collected in `.document`.
+    Raises ValueError for malformed JSON and PayloadTooLarge when more than
+    `max_size` bytes are read.
+    """
+
+    def __init__(self, stream, encoding="utf-8", chunk_size=64 * 1024, max_size=None):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.json = json.JSONDecoder()
+        self.document = {}
+        self.buffer = ""
+        self.pos = 0
+        self.size = 0
+        self.eof = False
+
+    def read(self):
+        """
+        Reads and decodes another chunk. Returns None once the stream is
+        exhausted.
+        """
+        if self.eof:
+            return None
+        chunk = self.stream.read(self.chunk_size)
+        if chunk:
+            self.size += len(chunk)
+            if self.max_size is not None and self.size > self.max_size:
+                raise PayloadTooLarge("Request body exceeds {} bytes.".format(self.max_size))
+            text = self.decoder.decode(chunk)
+        else:
+            self.eof = True
+            text = self.decoder.decode(b"", final=True)
+        return text
+
+    def fill(self):
+        """
+        Reads another chunk into the buffer, discarding consumed text.
+        Returns False once the stream is exhausted.
+        """
+        text = self.read()
+        if text is None:
+            return False
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Returns the next non-whitespace character without consuming it, or
+        an empty string at the end of the stream.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def position(self, i):
+        return self.size - len(self.buffer) + i
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError("Expecting one of {!r} at character {}".format(chars, self.position(self.pos)))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Decodes the next value. Its end is found with a Scanner first, so
+        chunks are joined once and decoded once rather than re-parsed after
+        every read.
+        """
+        char = self.peek()
+        if not char:
+            raise ValueError("Unexpected end of JSON data")
+        scanner = Scanner(char)
+        end = scanner.feed(self.buffer, self.pos)
+        if end is None:
+            parts = []
+            offset = len(self.buffer) - self.pos
+            while end is None:
+                text = self.read()
+                if text is None:
+                    if not scanner.scalar:
+                        raise ValueError("Unexpected end of JSON data")
+                    break
+                if parts:
+                    offset += len(parts[-1])
+                parts.append(text)
+                end = scanner.feed(text)
+            self.buffer = self.buffer[self.pos:] + "".join(parts)
+            self.pos = 0
+            end = len(self.buffer) if end is None else offset + end
+        value, stop = self.json.raw_decode(self.buffer, self.pos)
+        if stop != end:
+            raise ValueError("Invalid JSON at character {}".format(self.position(stop)))
+        self.pos = end
+        return value
+
+    def member(self):
+        key = self.value()
+        if not isinstance(key, type("")):
+            raise ValueError("Expecting property name")
+        self.expect(":")
+        return key
+
+    def open(self):
+        """
+        Parses up to the first element of a "data" list. Returns True if
+        one was found; otherwise the whole document has been parsed into
+        `.document`.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return self.close()
+        while True:
+            key = self.member()
+            if key == "data" and self.peek() == "[":
+                self.pos += 1
+                return True
+            self.document[key] = self.value()
+            if self.expect(",}") == "}":
+                return self.close()
+
+    def elements(self):
+        if self.peek() == "]":
+            self.pos += 1
+        else:
+            while True:
+                yield self.value()
+                if self.expect(",]") == "]":
+                    break
+        while self.expect(",}") == ",":
+            key = self.member()
+            self.document[key] = self.value()
+        self.close()
+
+    def close(self):
+        if self.peek():
+            raise ValueError("Extra data after JSON document")
+        return False
@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+
+import multiprocessing
+
+import django
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ...export import FORMATS, Export, run_task
+
+
+class Command(BaseCommand):
+
+    help = "Exports every resource of a type to compressed NDJSON or JSON:API files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("api_type")
+        parser.add_argument("--output", default=".", help="directory to write chunk files to")
+        parser.add_argument("--format", default="ndjson", choices=sorted(FORMATS))
+        parser.add_argument("--chunk-size", type=int, default=10000, help="resources per chunk file")
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="number of processes")
+        parser.add_argument("--no-compress", action="store_false", dest="compress", help="write plain files instead of gzip")
+        parser.add_argument("--restart", action="store_true", help="discard a previous, unfinished export")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--chunk-size and --workers must be positive.")
+        export = Export(
+            options["api_type"],
+            options["output"],
+            format=options["format"],
+            compress=options["compress"],
+            chunk_size=options["chunk_size"],
+        )
+        try:
+            ranges = export.load_ranges(restart=options["restart"])
+        except (LookupError, ValueError) as exc:
+            raise CommandError(str(exc))
+        tasks = export.pending(ranges)
+        total = len(ranges)
+        done = total - len(tasks)
+        if done:
+            self.stdout.write("Resuming: {} of {} chunks already exported.".format(done, total))
+        if options["workers"] == 1 or len(tasks) < 2:
+            results = (run_task(task) for task in tasks)
+            self.report(results, export, done, total)
+        else:
+            # forked workers must open their own database connections
+            connections.close_all()
+            pool = self.get_pool(min(options["workers"], len(tasks)))
+            try:
+                self.report(pool.imap_unordered(run_task, tasks), export, done, total)
+                pool.close()
+            finally:
+                pool.terminate()
+                pool.join()
+        self.stdout.write("Exported {} chunks of {} to {}.".format(total, export.api_type, export.directory))
+
+    def get_pool(self, processes):
+        """
+        Returns a pool of forked workers, which inherit the configured
+        Django. Platforms without fork start fresh interpreters instead, so
+        each worker sets up Django itself before running tasks.
+        """
+        try:
+            context = multiprocessing.get_context("fork")
+        except AttributeError:
+            # Python 2 always forks
+            context = multiprocessing
+        except ValueError:
+            return multiprocessing.Pool(processes, initializer=django.setup)
+        return context.Pool(processes)
+
+    def report(self, results, export, done, total):
+        for index, count in results:
+            done += 1
+            self.stdout.write("[{}/{}] {} ({} resources)".format(done, total, export.chunk_path(index), count))
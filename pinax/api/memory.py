@@ -0,0 +1,162 @@
+from __future__ import unicode_literals
+
+import contextlib
+import logging
+import os
+
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .exceptions import MemoryBudgetExceeded
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+logger = logging.getLogger(__name__)
+
+MEMORY_HEADER = "X-Pinax-Memory"
+
+
+class NullMemoryTracker(object):
+    """
+    Stand-in used when memory is neither tracked nor budgeted.
+    """
+
+    enabled = False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        yield
+
+    def check(self):
+        pass
+
+    def finish(self, response):
+        pass
+
+
+null_memory_tracker = NullMemoryTracker()
+
+
+class MemoryTracker(object):
+    """
+    Measures Python allocations with tracemalloc during the serialize and
+    encode phases of a request. Records the peak traced memory (in bytes)
+    of each phase and, when `top` is set, the source lines holding the
+    most memory once serialization is done. `check()` raises
+    MemoryBudgetExceeded when more than `budget` bytes are allocated.
+
+    tracemalloc traces the whole process, so allocations made by other
+    threads meanwhile are counted too.
+    """
+
+    enabled = True
+
+    def __init__(self, endpointset, budget=None, top=0, report=True):
+        self.endpointset = endpointset
+        self.budget = budget
+        self.top = top
+        self.report = report
+        self.peaks = OrderedDict()
+        self.sites = []
+        self.baseline = None
+
+    @property
+    def peak(self):
+        return max(self.peaks.values()) if self.peaks else 0
+
+    def begin(self):
+        start_tracing()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self.baseline is None:
+            self.begin()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            # without reset_peak() (Python < 3.9) peaks are since the first phase
+            peak = tracemalloc.get_traced_memory()[1] - self.baseline
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+            if name == "serialize" and self.top:
+                self.sites = top_sites(tracemalloc.take_snapshot(), self.top)
+
+    def check(self):
+        if self.budget is None or self.baseline is None:
+            return
+        used = tracemalloc.get_traced_memory()[0] - self.baseline
+        if used > self.budget:
+            raise MemoryBudgetExceeded(used, self.budget)
+
+    def finish(self, response):
+        if not self.report or not self.peaks:
+            return
+        logger.info(
+            "{}.{} peak={} {} top: {}".format(
+                self.endpointset.__class__.__name__,
+                getattr(self.endpointset, "requested_method", None) or self.endpointset.request.method.lower(),
+                self.peak,
+                " ".join("{}={}".format(name, peak) for name, peak in self.peaks.items()),
+                ", ".join("{}:{}={}".format(filename, lineno, size) for filename, lineno, size in self.sites),
+            )
+        )
+        if self.endpointset.debug:
+            response[MEMORY_HEADER] = ", ".join(
+                "{};peak={}".format(name, peak) for name, peak in self.peaks.items()
+            )
+
+
+def top_sites(snapshot, limit):
+    """
+    Returns `(file name, line number, bytes)` for the `limit` source lines
+    holding the most memory in `snapshot`, leaving out tracemalloc itself.
+    """
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    sites = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        sites.append((os.path.basename(frame.filename), frame.lineno, stat.size))
+    return sites
+
+
+def memory_enabled():
+    """
+    True when PINAX_API_MEMORY_TRACKING is enabled or a
+    PINAX_API_MEMORY_BUDGET (bytes) is set, on Pythons with tracemalloc.
+    """
+    if tracemalloc is None:
+        return False
+    return bool(getattr(settings, "PINAX_API_MEMORY_TRACKING", False) or getattr(settings, "PINAX_API_MEMORY_BUDGET", None))
+
+
+def start_tracing():
+    """
+    Starts tracemalloc for the process unless it is already tracing. It is
+    started from AppConfig.ready() when memory_enabled() and never stopped,
+    as stopping it would discard traces other requests are measuring.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def get_memory_tracker(endpointset):
+    """
+    Returns a MemoryTracker when memory_enabled().
+    """
+    if not memory_enabled():
+        return null_memory_tracker
+    tracking = getattr(settings, "PINAX_API_MEMORY_TRACKING", False)
+    budget = getattr(settings, "PINAX_API_MEMORY_BUDGET", None)
+    return MemoryTracker(
+        endpointset,
+        budget=budget,
+        top=getattr(settings, "PINAX_API_MEMORY_TOP_SITES", 10) if tracking else 0,
+        report=tracking,
+    )
@@ -1,7 +1,37 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.http import Http404
+from django.utils import lru_cache
+
+from .permissions import overrides
+
+
+@lru_cache.lru_cache(maxsize=None)
+def to_one_fields(resource_class):
+    """
+    Returns names of model foreign key / one-to-one fields backing the
+    to-one relationships of `resource_class`, suitable for select_related().
+    """
+    fields = []
+    for related_name, rel in resource_class.relationships.items():
+        if rel.collection:
+            continue
+        attr = rel.attr if rel.attr is not None else related_name
+        try:
+            field = resource_class.model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # not a model field (i.e. a property)
+            continue
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            fields.append(field.name)
+    return fields
 
 
 class DjangoModelEndpointSetMixin(object):
 
+    # delete_object() issues a queryset DELETE instead of loading the
+    # object; skips overridden Model.delete() methods
+    bulk_delete = False
+
     def get_pk(self):
         """
         Convenience method returning URL PK kwarg.
@@ -24,10 +54,81 @@ class DjangoModelEndpointSetMixin(object):
         """
         return self.get_resource_object_model()._default_manager.all()
 
+    def get_retrieve_queryset(self):
+        """
+        Queryset used to look up `self.obj` for retrieve, joined with the
+        resource's to-one relationships.
+        """
+        return self.get_queryset().select_related(*to_one_fields(self.resource_class))
+
+    def get_update_queryset(self):
+        """
+        Queryset used to look up `self.obj` for update; the updated
+        resource is rendered, so to-one relationships are joined as well.
+        """
+        return self.get_retrieve_queryset()
+
+    def get_destroy_queryset(self):
+        """
+        Queryset used to look up (or delete) the object for destroy.
+        """
+        return self.get_queryset()
+
+    def get_object_queryset(self):
+        """
+        Returns the per-verb queryset for the requested method, with object
+        permissions applied.
+        """
+        method = getattr(self, "get_{}_queryset".format(self.requested_method), self.get_queryset)
+        return self.filter_queryset(method())
+
+    def get_object(self):
+        """
+        Retrieves the object for `self.pk`, raising 404 if it is not found
+        or not permitted.
+        """
+        resource_model = self.get_resource_object_model()
+        # Use the model primary key field name
+        kwargs = {resource_model._meta.pk.name: self.pk}
+        obj = self.get_object_or_404(self.get_object_queryset(), **kwargs)
+        if not self.filter_resources([self.resource_class(obj)], queryset=True):
+            raise Http404("{} does not exist.".format(resource_model._meta.verbose_name.capitalize()))
+        return obj
+
+    @property
+    def obj(self):
+        """
+        The requested object, loaded on first access.
+        """
+        obj = self.__dict__.get("_obj")
+        if obj is None:
+            obj = self._obj = self.get_object()
+        return obj
+
+    @obj.setter
+    def obj(self, value):
+        self._obj = value
+
+    def delete_object(self):
+        """
+        Deletes the requested object with `Model.delete()`. With
+        `bulk_delete` set it instead deletes through the queryset without
+        loading the object, raising 404 if nothing was deleted, unless
+        object permissions must inspect the object.
+        """
+        if not self.bulk_delete or any(overrides(perm, "filter_objects") for perm in self.object_permissions):
+            self.obj.delete()
+            return
+        resource_model = self.get_resource_object_model()
+        qs = self.get_object_queryset().filter(**{resource_model._meta.pk.name: self.pk})
+        deleted, _ = qs.delete()
+        if not deleted:
+            raise Http404("{} does not exist.".format(resource_model._meta.verbose_name.capitalize()))
+
     def prepare(self):
         """
         Sets `self.pk` to the requested PK
-        Sets `self.obj` to a retrieved Resource object.
+        Prepares `self.obj`, retrieved (or a 404 raised) on first access.
 
         Assumes Resource object is based on Django model.
         No action is taken if requested method does not operate on single objects.
@@ -36,6 +137,4 @@ class DjangoModelEndpointSetMixin(object):
         if resource_model:
             if self.requested_method in ["retrieve", "update", "destroy"]:
                 self.pk = self.get_pk()
-                # Use the model primary key field name
-                kwargs = {resource_model._meta.pk.name: self.pk}
-                self.obj = self.get_object_or_404(self.get_queryset(), **kwargs)
+                self._obj = None
@@ -0,0 +1,99 @@
+from __future__ import unicode_literals
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.query import QuerySet
+
+from .resource import keyset_after, keyset_annotate, keyset_nullable, keyset_ordering
+
+
+class CursorPage(list):
+    """
+    Resources of one cursor page. `next_cursor` and `previous_cursor` are
+    the `page[cursor]` values of the adjacent pages, or None at either end.
+    """
+
+    next_cursor = None
+    previous_cursor = None
+
+
+class CursorPaginator(object):
+    """
+    Paginates querysets by keyset: a page is selected by the sort keys of
+    the row before (or after) it rather than by an offset, so every page
+    costs the same however far into the collection it is, and rows created
+    or deleted meanwhile do not shift pages. Total counts are not reported.
+
+    Use it with `paginator_class = CursorPaginator` on an EndpointSet;
+    clients then move between pages with `page[cursor]` links.
+    """
+
+    page_param = "page[cursor]"
+
+    def __init__(self, object_list, per_page):
+        if not isinstance(object_list, QuerySet):
+            raise TypeError("CursorPaginator requires a queryset")
+        self.object_list = object_list
+        self.per_page = per_page
+
+    def get_keys(self):
+        keys = keyset_ordering(self.object_list)
+        if keys is None:
+            raise InvalidPage("cursor pagination requires ordering by fields")
+        for path, descending in keys:
+            if keyset_nullable(self.object_list.model, path):
+                raise InvalidPage("cursor pagination cannot order by {}, which may be null".format(path))
+        return keys
+
+    def encode_cursor(self, direction, values):
+        cursor = json.dumps([direction, values], cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(cursor.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor, keys):
+        try:
+            cursor = base64.urlsafe_b64decode(str(cursor + "=" * (-len(cursor) % 4)))
+            direction, values = json.loads(cursor.decode("utf-8"))
+        except (TypeError, ValueError, binascii.Error):
+            raise InvalidPage("page[cursor] is invalid")
+        if direction not in ("after", "before") or not isinstance(values, list) or len(values) != len(keys):
+            raise InvalidPage("page[cursor] is invalid")
+        return direction, values
+
+    def page(self, cursor=None):
+        keys = self.get_keys()
+        forward, values = True, None
+        if cursor:
+            direction, values = self.decode_cursor(cursor, keys)
+            forward = direction == "after"
+        if not forward:
+            # read backwards from the cursor, then restore the order
+            keys = [(path, not descending) for path, descending in keys]
+        qs, aliases = keyset_annotate(self.object_list, keys)
+        try:
+            if values is not None:
+                qs = qs.filter(keyset_after(aliases, keys, values))
+            rows = list(qs[:self.per_page + 1])
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidPage("page[cursor] is invalid")
+        more = len(rows) > self.per_page
+        page = CursorPage(rows[:self.per_page])
+        if not forward:
+            page.reverse()
+        # the cursor's side of the page always has rows; the other has if
+        # more rows than a page were read
+        has_next, has_previous = (more, values is not None) if forward else (values is not None, more)
+        if page:
+            first, last = [
+                [getattr(getattr(row, "obj", row), alias) for alias in aliases]
+                for row in (page[0], page[-1])
+            ]
+            if has_next:
+                page.next_cursor = self.encode_cursor("after", last)
+            if has_previous:
+                page.previous_cursor = self.encode_cursor("before", first)
+        return page
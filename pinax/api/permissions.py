@@ -1,6 +1,47 @@
+from __future__ import unicode_literals
+
+from django.utils import six
+
 
 def add(backends):
     def decorator(func):
         func.permissions = backends
         return func
     return decorator
+
+
+class ObjectPermission(object):
+    """
+    Row-level permission evaluated for whole collections at once.
+
+    Override `filter_queryset()` to restrict rows in SQL, or
+    `filter_objects()` to check a batch of objects in a single call.
+    Object permissions are listed alongside request-level permission
+    functions and are applied to queryset collections, pages, included
+    resources and (with DjangoModelEndpointSetMixin) single-object lookups.
+    Both hooks receive objects of every model being rendered, so return
+    unrelated querysets or objects unchanged.
+    """
+
+    def __call__(self, request, view=None):
+        # no request-level opinion
+        return None
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset
+
+    def filter_objects(self, request, objs, view):
+        """
+        Returns the permitted subset of `objs`. By default checks the
+        objects against `filter_queryset()` with one query per call.
+        """
+        if not objs or not overrides(self, "filter_queryset"):
+            return objs
+        model = type(objs[0])
+        qs = model._default_manager.filter(pk__in=[obj.pk for obj in objs])
+        allowed = set(self.filter_queryset(request, qs, view).values_list("pk", flat=True))
+        return [obj for obj in objs if obj.pk in allowed]
+
+
+def overrides(perm, name):
+    return six.get_unbound_function(getattr(type(perm), name)) is not six.get_unbound_function(getattr(ObjectPermission, name))
@@ -0,0 +1,220 @@
+from __future__ import unicode_literals
+
+import cProfile
+import collections
+import io
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Pinax-Profile"
+PROFILE_PARAM = "pinax-profile"
+
+
+class NullProfiler(object):
+    """
+    Stand-in used when a request is not profiled.
+    """
+
+    enabled = False
+
+    def start(self):
+        pass
+
+    def finish(self, response):
+        pass
+
+
+null_profiler = NullProfiler()
+
+
+class CProfileCollector(object):
+
+    extension = "prof"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path):
+        self.profile.dump_stats(path)
+
+
+class SamplingCollector(object):
+    """
+    Records the stack of the request thread every `interval` seconds from
+    a background thread, saved in collapsed-stack format (one
+    `outer;inner count` line per distinct stack) for flame graph tools.
+    """
+
+    extension = "collapsed"
+
+    def __init__(self, interval=None):
+        if interval is None:
+            interval = getattr(settings, "PINAX_API_PROFILE_INTERVAL", 0.005)
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread_id = threading.current_thread().ident
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append("{}:{}".format(os.path.basename(code.co_filename), code.co_name))
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        if not self.stacks:
+            # requests shorter than `interval` still get the stack they end in
+            self.sample()
+
+    def save(self, path):
+        with io.open(path, "w", encoding="utf-8") as fp:
+            for stack, count in self.stacks.most_common():
+                fp.write("{} {}\n".format(stack, count))
+
+
+COLLECTORS = {
+    "cprofile": CProfileCollector,
+    "sampling": SamplingCollector,
+}
+
+
+class Profiler(object):
+    """
+    Profiles a single EndpointSet request from authentication onwards and
+    writes the result to PINAX_API_PROFILE_DIR. Profiles a client asked
+    for are only taken for staff users (or in debug mode), and their file
+    name is returned in the X-Pinax-Profile response header.
+    """
+
+    enabled = True
+
+    def __init__(self, endpointset, kind, requested=False):
+        self.endpointset = endpointset
+        self.kind = kind
+        self.requested = requested
+        self.collector = None
+
+    def allowed(self):
+        if not self.requested or self.endpointset.debug:
+            return True
+        return getattr(self.endpointset.request.user, "is_staff", False)
+
+    def start(self):
+        if not self.allowed():
+            return
+        collector = COLLECTORS[self.kind]()
+        try:
+            collector.start()
+        except Exception:
+            # i.e. cProfile refuses to start while another profiler (or a
+            # coverage tool) is active; serve the request unprofiled
+            logger.exception("Could not start %s profiler", self.kind)
+            return
+        self.collector = collector
+
+    def finish(self, response):
+        if self.collector is None:
+            return
+        name = "{}.{}.{}.{}.{}".format(
+            self.endpointset.__class__.__name__,
+            getattr(self.endpointset, "requested_method", None) or self.endpointset.request.method.lower(),
+            int(time.time() * 1000),
+            os.getpid(),
+            self.collector.extension,
+        )
+        if getattr(response, "streaming", False):
+            # the body is produced after dispatch() returns; keep profiling
+            # until the server closes the response
+            response.streaming_content = ClosingIterator(response.streaming_content, lambda: self.save(name))
+        elif not self.save(name):
+            return
+        if self.requested:
+            response[PROFILE_HEADER] = name
+
+    def save(self, name):
+        self.collector.stop()
+        directory = getattr(settings, "PINAX_API_PROFILE_DIR", None) or tempfile.gettempdir()
+        path = os.path.join(directory, name)
+        try:
+            self.collector.save(path)
+        except (IOError, OSError):
+            logger.exception("Could not write profile to %s", path)
+            return False
+        logger.info("Profile written to %s", path)
+        return True
+
+
+class ClosingIterator(object):
+    """
+    Iterates over `iterable` and calls `callback` once when closed, which
+    the WSGI server does after sending the last chunk (or giving up).
+    """
+
+    def __init__(self, iterable, callback):
+        self.iterator = iter(iterable)
+        self.callback = callback
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.iterator)
+
+    next = __next__
+
+    def close(self):
+        callback, self.callback = self.callback, None
+        if callback is not None:
+            callback()
+
+
+def get_profiler(endpointset):
+    """
+    Returns a Profiler when PINAX_API_PROFILING is enabled and the request
+    either asks for a profile (X-Pinax-Profile header or `pinax-profile`
+    query parameter, naming "cprofile" or "sampling") or is picked at
+    PINAX_API_PROFILE_SAMPLE_RATE.
+    """
+    if not getattr(settings, "PINAX_API_PROFILING", False):
+        return null_profiler
+    request = endpointset.request
+    default = getattr(settings, "PINAX_API_PROFILER", "cprofile")
+    kind = request.META.get("HTTP_X_PINAX_PROFILE") or request.GET.get(PROFILE_PARAM)
+    if kind:
+        return Profiler(endpointset, kind if kind in COLLECTORS else default, requested=True)
+    rate = getattr(settings, "PINAX_API_PROFILE_SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        return Profiler(endpointset, default)
+    return null_profiler
@@ -0,0 +1,164 @@
+from __future__ import unicode_literals
+
+import hashlib
+import threading
+import time
+
+from .exceptions import ErrorResponse
+
+
+PERIODS = {
+    "s": 1,
+    "m": 60,
+    "h": 60 * 60,
+    "d": 24 * 60 * 60,
+}
+
+
+def parse_rate(rate):
+    """
+    Parses "100/m" style rates into `(limit, period in seconds)`.
+    """
+    limit, period = rate.split("/")
+    return int(limit), PERIODS[period[0]]
+
+
+def by_ip(request, view):
+    return "ip:{}".format(request.META.get("REMOTE_ADDR", ""))
+
+
+def by_user(request, view):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated():
+        return "user:{}".format(user.pk)
+    return None
+
+
+def by_token(request, view):
+    token = request.META.get("HTTP_AUTHORIZATION")
+    if token:
+        return "token:{}".format(hashlib.sha256(token.encode("utf-8")).hexdigest())
+    return None
+
+
+def by_user_or_ip(request, view):
+    return by_user(request, view) or by_ip(request, view)
+
+
+def endpoint_scope(view):
+    resource_class = getattr(view, "resource_class", None)
+    name = getattr(resource_class, "api_type", None) or view.__class__.__name__
+    return "{}:{}".format(name, getattr(view, "requested_method", None) or view.request.method.lower())
+
+
+def global_scope(view):
+    return "*"
+
+
+class CacheStorage(object):
+    """
+    Counters kept in a Django cache, shared by every process using it.
+    """
+
+    def __init__(self, cache="default"):
+        self.cache_alias = cache
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def incr(self, key, ttl):
+        self.cache.add(key, 0, ttl)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # expired between add() and incr()
+            self.cache.set(key, 1, ttl)
+            return 1
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+
+class LocalStorage(object):
+    """
+    In-process counters; suitable for tests and single-process servers.
+
+    Expired counters (windows older than the previous one) are dropped as
+    new ones are incremented so memory stays bounded by the active clients.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.sweep_at = None
+
+    def sweep(self, now):
+        self.counters = {
+            key: (value, expires)
+            for key, (value, expires) in self.counters.items()
+            if expires > now
+        }
+        expiries = [expires for value, expires in self.counters.values()]
+        self.sweep_at = min(expiries) if expiries else None
+
+    def incr(self, key, ttl):
+        with self.lock:
+            now = self.clock()
+            if self.sweep_at is not None and self.sweep_at <= now:
+                self.sweep(now)
+            value, expires = self.counters.get(key, (0, None))
+            if expires is None or expires <= now:
+                value, expires = 0, now + ttl
+            self.counters[key] = (value + 1, expires)
+            if self.sweep_at is None or expires < self.sweep_at:
+                self.sweep_at = expires
+            return value + 1
+
+    def get(self, key):
+        with self.lock:
+            value, expires = self.counters.get(key, (0, None))
+            if expires is None or expires <= self.clock():
+                return 0
+            return value
+
+
+class RateLimit(object):
+    """
+    Pre hook rejecting clients which exceed `rate` (i.e. "100/m") with a
+    JSON:API 429 error before `prepare()` runs.
+
+    Requests are counted with a sliding window: the count in the current
+    fixed window plus the previous window's count weighted by how much of it
+    still overlaps. `key` identifies the client (user, token or IP) and
+    `scope` the limited endpoints (each endpointset/verb by default).
+    """
+
+    def __init__(self, rate, key=by_user_or_ip, scope=endpoint_scope, storage=None, clock=time.time, prefix="pinax-api-ratelimit"):
+        self.limit, self.period = parse_rate(rate)
+        self.key = key
+        self.scope = scope
+        self.storage = storage if storage is not None else CacheStorage()
+        self.clock = clock
+        self.prefix = prefix
+
+    def __call__(self, request, view):
+        client = self.key(request, view)
+        if client is None:
+            return
+        now = self.clock()
+        window = int(now // self.period)
+        key = "{}:{}:{}".format(self.prefix, self.scope(view), client)
+        current = self.storage.incr("{}:{}".format(key, window), self.period * 2)
+        previous = self.storage.get("{}:{}".format(key, window - 1))
+        overlap = 1 - (now % self.period) / float(self.period)
+        if previous * overlap + current > self.limit:
+            exc = ErrorResponse(**view.error_response_kwargs(
+                "Request was throttled.",
+                title="Too Many Requests",
+                status=429,
+            ))
+            exc.response["Retry-After"] = str(int(self.period - now % self.period) + 1)
+            raise exc
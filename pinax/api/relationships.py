@@ -9,6 +9,17 @@ class Relationship(object):
         self.api_type = api_type
         self.collection = collection
         self.attr = attr
+        self._resource_class = None
 
     def resource_class(self):
+        if self._resource_class is not None:
+            return self._resource_class
         return registry.get(self.api_type)
+
+    def resolve(self):
+        """
+        Pins the resource class currently registered for `api_type` (the
+        bound class once endpointsets are imported) and returns it.
+        """
+        self._resource_class = registry.get(self.api_type)
+        return self._resource_class
@@ -2,14 +2,17 @@ from __future__ import unicode_literals
 
 import collections
 import datetime
+import itertools
 
 from collections import namedtuple
 from functools import partial
 from operator import attrgetter, itemgetter
 
-from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.core.exceptions import FieldDoesNotExist, ValidationError, ObjectDoesNotExist
 from django.core.urlresolvers import reverse, NoReverseMatch
-from django.db.models.query import ModelIterable
+from django.db.models import F, Q
+from django.db.models.query import ModelIterable, prefetch_related_objects
+from django.utils import lru_cache, six
 
 from . import rfc3339
 from .exceptions import SerializationError
@@ -25,17 +28,41 @@ class Attribute(object):
 
 class ResourceIterable(ModelIterable):
 
-    def __init__(self, resource_class, queryset):
+    def __init__(self, resource_class, queryset, *args, **kwargs):
+        # Django 1.11+ passes chunked_fetch (and later chunk_size) along
         self.resource_class = resource_class
-        super(ResourceIterable, self).__init__(queryset)
+        super(ResourceIterable, self).__init__(queryset, *args, **kwargs)
 
     def __iter__(self):
-        for obj in super(ResourceIterable, self).__iter__():
+        queryset = self.queryset
+        objs = super(ResourceIterable, self).__iter__()
+        if queryset._prefetch_related_lookups and not queryset._prefetch_done:
+            # prefetch onto model instances, one batch at a time; Django
+            # would otherwise attempt it on the resources once cached.
+            queryset._prefetch_done = True
+            objs = prefetch_batches(objs, queryset._prefetch_related_lookups, PREFETCH_BATCH_SIZE)
+        for obj in objs:
             yield self.resource_class(obj)
 
 
+PREFETCH_BATCH_SIZE = 2000  # objects per prefetch_related() round
+
+
+def prefetch_batches(objs, lookups, batch_size):
+    objs = iter(objs)
+    while True:
+        batch = list(itertools.islice(objs, batch_size))
+        if not batch:
+            return
+        prefetch_related_objects(batch, *lookups)
+        for obj in batch:
+            yield obj
+
+
 empty = object()
 
+INCLUDE_CACHE_SIZE = 512  # distinct (resource class, include) values to cache
+
 
 def scoped(iterable, scope):
     for attr in iterable:
@@ -63,12 +90,44 @@ class Resource(object):
     api_type = ""
     attributes = []
     relationships = {}
+    sortable = []
+    # model field holding `id` (i.e. "pk"); lets nested resources build URLs
+    # from foreign key columns instead of loading this resource's objects
+    id_field = None
+    # reject unknown and read-only attributes/relationships in payloads
+    # rather than silently discarding them
+    strict_attributes = True
     bound_endpointset = None
 
     @classmethod
     def from_queryset(cls, qs):
+        annotations = {
+            attr: F(path)
+            for kwarg, attr, path in ancestor_key_paths(cls) or ()
+            if attr != path
+        }
+        if annotations:
+            qs = qs.annotate(**annotations)
         return qs._clone(_iterable_class=partial(ResourceIterable, cls))
 
+    @classmethod
+    def get_ordering(cls, sort):
+        """
+        Translate a JSON:API `sort` value (i.e. "-created,title") into
+        queryset ordering. Only attributes named in `sortable` are accepted.
+        The primary key is always appended as a tie-breaker so paginated
+        results are deterministic.
+        """
+        attrs = dict((attr.name, attr) for attr in scoped(cls.attributes, "r"))
+        ordering = []
+        for field in sort.split(","):
+            name = field[1:] if field.startswith("-") else field
+            if name not in cls.sortable or name not in attrs:
+                raise SerializationError("'{}' is not a valid sort field".format(name))
+            ordering.append("{}{}".format("-" if field.startswith("-") else "", attrs[name].obj_attr))
+        ordering.append("pk")
+        return ordering
+
     def __init__(self, obj=None):
         self.obj = obj
         self.meta = {}
@@ -120,6 +179,18 @@ class Resource(object):
         assert hasattr(self, "endpointset"), "resolve_url_kwargs requires a bound resource (got {}).".format(self)
         kwargs = {}
         endpointset = self.endpointset
+        paths = ancestor_key_paths(type(self)) if endpointset.parent is not None else None
+        if paths is not None:
+            try:
+                for kwarg, attr, path in paths:
+                    kwargs[kwarg] = getattr(self.obj, attr)
+            except AttributeError:
+                # not loaded through from_queryset(); walk the ancestors
+                kwargs = {}
+            else:
+                if endpointset.url.lookup is not None:
+                    kwargs[endpointset.url.lookup["field"]] = endpointset.resource_class(self.obj).id
+                return kwargs
         child_obj = None  # moving object as we traverse the ancestors
         while endpointset is not None:
             if child_obj is None:
@@ -184,6 +255,9 @@ class Resource(object):
         attr = rel.attr if rel.attr is not None else related_name
         if not rel.collection:
             f = self.model._meta.get_field(attr)
+            if value["data"] is None:
+                setattr(self.obj, f.name, None)
+                return
             try:
                 o = f.rel.to._default_manager.get(pk=value["data"]["id"])
             except ObjectDoesNotExist:
@@ -271,30 +345,215 @@ class Resource(object):
         if included is not None:
             if linkage:
                 included.add(self)
-            for path in included.paths:
-                resolve_include(self, path, included)
+            else:
+                included.add_primary(self)
+            resolve_include(self, included.tree, included)
         return data
 
 
-def resolve_include(resource, path, included):
-    if path == "self":
+def ancestor_key_paths(resource_class):
+    """
+    Returns `(url kwarg, attribute, ORM path)` triples reading the ids of
+    the parent endpointsets of a nested `resource_class` from its own model:
+    the foreign key column for a direct parent, or a queryset annotation
+    (added by `from_queryset()`) for further ancestors. Returns None unless
+    every ancestor is reached through foreign keys and declares `id_field`.
+    """
+    endpointset = getattr(resource_class, "endpointset", None)
+    model = getattr(resource_class, "model", None)
+    if endpointset is None or model is None or endpointset.parent is None:
+        return None
+    return bound_key_paths(endpointset, model)
+
+
+@lru_cache.lru_cache(maxsize=None)
+def bound_key_paths(endpointset, model):
+    """
+    Cached part of `ancestor_key_paths()`, keyed on the endpointset and
+    model a resource is bound to so a lookup made before binding is never
+    remembered.
+    """
+    paths, names = [], []
+    parent = endpointset.parent
+    while parent is not None:
+        id_field = getattr(parent.resource_class, "id_field", None)
+        if parent.url.lookup is None or id_field is None:
+            return None
+        try:
+            field = model._meta.get_field(parent.url.lookup["field"])
+        except FieldDoesNotExist:
+            return None
+        if not (field.concrete and (field.many_to_one or field.one_to_one)):
+            return None
+        names.append(field.name)
+        target = field.target_field
+        if len(names) == 1 and (id_field == target.name or (id_field == "pk" and target.primary_key)):
+            attr = path = field.attname
+        else:
+            path = "__".join(names + [id_field])
+            attr = "pinax_api_url_{}".format(parent.url.lookup["field"])
+        paths.append((parent.url.lookup["field"], attr, path))
+        model, parent = field.related_model, parent.parent
+    return tuple(paths)
+
+
+@lru_cache.lru_cache(maxsize=INCLUDE_CACHE_SIZE)
+def parse_include(resource_class, include):
+    """
+    Parses a JSON:API `include` value (i.e. "author,tags.article") into a
+    tree of relationship names validated against `resource_class`. The tree
+    is a tuple of `(related_name, subtree)` pairs and is cached per
+    `(resource_class, include)` so repeated requests skip re-parsing.
+    """
+    tree = collections.OrderedDict()
+    for path in include.split(","):
+        if path == "self":
+            continue
+        node, current = tree, resource_class
+        for name in path.split("."):
+            if current is None or name not in current.relationships:
+                raise SerializationError("'{}' is not a valid relationship to include".format(name))
+            node = node.setdefault(name, collections.OrderedDict())
+            current = current.relationships[name].resource_class()
+    return freeze_include(tree)
+
+
+def freeze_include(tree):
+    return tuple((name, freeze_include(subtree)) for name, subtree in tree.items())
+
+
+def resolve_include(resource, tree, included):
+    key = (resource.identifier, tree)
+    if key in included.resolved:
         return
-    try:
-        head, rest = path.split(".", 1)
-    except ValueError:
-        head, rest = path, ""
-    if head not in resource.relationships:
-        raise SerializationError("'{}' is not a valid relationship to include".format(head))
-    rel = resource.relationships[head]
-    if rel.collection:
-        for obj in resource.get_relationship(head, rel):
+    included.resolved.add(key)
+    for head, rest in tree:
+        rel = resource.relationships[head]
+        if rel.collection:
+            objs = resource.get_relationship(head, rel)
+        else:
+            objs = [resource.get_relationship(head, rel)]
+        for obj in objs:
+            if obj is None:
+                continue
             r = rel.resource_class()(obj)
             if rest:
                 resolve_include(r, rest, included)
             included.add(r)
-    else:
-        r = rel.resource_class()(resource.get_relationship(head, rel))
-        included.add(r)
+
+
+def resource_class_of(data):
+    """
+    Returns the Resource class of `data`: a resource, a list of resources
+    or a queryset from `Resource.from_queryset()`. Returns None otherwise.
+    """
+    if isinstance(data, Resource):
+        return type(data)
+    iterable_class = getattr(data, "_iterable_class", None)
+    if isinstance(iterable_class, partial) and iterable_class.func is ResourceIterable:
+        return iterable_class.args[0]
+    if isinstance(data, (list, tuple)) and data and isinstance(data[0], Resource):
+        return type(data[0])
+    return None
+
+
+def keyset_ordering(qs):
+    """
+    Returns `(path, descending)` pairs for the ordering of `qs`, cut after
+    the primary key or with it appended so rows are ordered uniquely.
+    Returns None for orderings other than field names (i.e. "?").
+    """
+    ordering = qs.query.order_by or qs.model._meta.ordering
+    pk_names = ("pk", qs.model._meta.pk.name)
+    keys = []
+    for field in ordering:
+        if not isinstance(field, six.string_types) or field == "?":
+            return None
+        path = field.lstrip("-")
+        keys.append((path, field.startswith("-")))
+        if path in pk_names:
+            return keys
+    keys.append(("pk", False))
+    return keys
+
+
+def keyset_nullable(model, path):
+    """
+    Returns whether ordering `model` by `path` can yield NULL sort keys:
+    the path crosses a nullable field, a many-to-many or reverse relation
+    (joined with LEFT OUTER JOIN), or names something other than model
+    fields (i.e. an annotation), whose nullability is unknown.
+    """
+    opts = model._meta
+    names = path.split("__")
+    for i, name in enumerate(names):
+        try:
+            field = opts.pk if name == "pk" else opts.get_field(name)
+        except FieldDoesNotExist:
+            return True
+        if field.null or field.many_to_many:
+            return True
+        if i < len(names) - 1:
+            if not field.is_relation:
+                return True
+            opts = field.related_model._meta
+    return False
+
+
+def keyset_annotate(qs, keys):
+    """
+    Returns `(qs, aliases)`: `qs` annotated with its sort keys (so they can
+    be read back from each row) and ordered by them.
+    """
+    aliases = ["pinax_api_key_{}".format(i) for i in range(len(keys))]
+    qs = qs.annotate(**dict((alias, F(path)) for alias, (path, descending) in zip(aliases, keys)))
+    qs = qs.order_by(*["-" + alias if descending else alias for alias, (path, descending) in zip(aliases, keys)])
+    return qs, aliases
+
+
+def keyset_after(aliases, keys, values):
+    """
+    Returns a Q object selecting the rows ordered after the row whose sort
+    keys (annotated as `aliases`) are `values`.
+    """
+    q = Q()
+    for i, (alias, (path, descending)) in enumerate(zip(aliases, keys)):
+        cond = Q(**dict(zip(aliases[:i], values[:i])))
+        cond &= Q(**{"{}__{}".format(alias, "lt" if descending else "gt"): values[i]})
+        q |= cond
+    return q
+
+
+def iterate_chunks(qs, chunk_size):
+    """
+    Yields `qs` in lists of at most `chunk_size` items, so large
+    collections are read with bounded memory. Chunks are found by keyset
+    pagination: each query selects the rows after the last one read by its
+    sort keys and primary key, so every query costs the same however far
+    into the collection it is. Orderings which are not field names, and
+    sort keys which can be NULL, fall back to offsets: databases disagree on
+    where NULLs sort and comparisons never select them.
+    """
+    keys = keyset_ordering(qs)
+    if keys is not None and any(keyset_nullable(qs.model, path) for path, descending in keys):
+        keys = None
+    aliases = []
+    if keys is not None:
+        qs, aliases = keyset_annotate(qs, keys)
+    start, values = 0, None
+    while True:
+        if values is None:
+            chunk = list(qs[start:start + chunk_size])
+        else:
+            chunk = list(qs.filter(keyset_after(aliases, keys, values))[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        start += len(chunk)
+        if aliases:
+            obj = getattr(chunk[-1], "obj", chunk[-1])
+            values = [getattr(obj, alias) for alias in aliases]
 
 
 def resolve_value(value):
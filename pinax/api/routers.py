@@ -0,0 +1,114 @@
+from __future__ import unicode_literals
+
+import re
+
+from django.core.urlresolvers import RegexURLPattern, ResolverMatch
+
+
+class Node(object):
+
+    def __init__(self):
+        self.static = {}
+        self.dynamic = []  # (kwarg, regex, compiled regex, node)
+        self.endpoint = None  # (callback, url name)
+
+    def child(self, segment):
+        if not isinstance(segment, tuple):
+            return self.static.setdefault(segment, Node())
+        kwarg, regex = segment
+        for child_kwarg, child_regex, compiled, node in self.dynamic:
+            if (child_kwarg, child_regex) == (kwarg, regex):
+                return node
+        node = Node()
+        self.dynamic.append((kwarg, regex, re.compile(r"(?:{})\Z".format(regex), re.UNICODE), node))
+        return node
+
+    def match(self, segments, index, kwargs):
+        if index == len(segments):
+            if self.endpoint is None:
+                return None
+            return self.endpoint, kwargs
+        segment = segments[index]
+        node = self.static.get(segment)
+        if node is not None:
+            result = node.match(segments, index + 1, kwargs)
+            if result is not None:
+                return result
+        for kwarg, regex, compiled, node in self.dynamic:
+            if compiled.match(segment):
+                if kwarg is not None:
+                    kwargs = dict(kwargs)
+                    kwargs[kwarg] = segment
+                result = node.match(segments, index + 1, kwargs)
+                if result is not None:
+                    return result
+        return None
+
+
+class Router(object):
+    """
+    Resolves requests for many endpointsets with a single URL pattern which
+    walks a trie of path segments, so resolution time depends on the path
+    depth rather than the number of registered endpointsets.
+
+        router = api.Router()
+        router.register(ArticleEndpointSet)
+        urlpatterns = router.urls
+
+    `urls` also contains the usual named patterns so `reverse()` keeps
+    working; they are only reached for paths the trie does not know.
+    """
+
+    def __init__(self, endpointsets=()):
+        self.root = Node()
+        self.patterns = []
+        for endpointset in endpointsets:
+            self.register(endpointset)
+
+    def register(self, endpointset):
+        patterns = endpointset.as_urls()
+        callbacks = dict((pattern.name, pattern.callback) for pattern in patterns)
+        url = endpointset.url
+        routes = [
+            (url.collection_segments(), "{}-list".format(url.base_name)),
+            (url.detail_segments(), "{}-detail".format(url.base_name)),
+        ]
+        for related_name in endpointset.relationships:
+            routes.append((
+                url.detail_segments() + ("relationships", related_name),
+                "-".join([url.base_name, related_name, "relationship", "detail"]),
+            ))
+        for segments, name in routes:
+            self.add(segments, callbacks[name], name)
+        self.patterns.extend(patterns)
+        return endpointset
+
+    def add(self, segments, callback, name):
+        node = self.root
+        for segment in segments:
+            node = node.child(segment)
+        node.endpoint = (callback, name)
+
+    def match(self, path):
+        """
+        Returns `((callback, url name), kwargs)` for `path` (without a
+        leading slash), or None.
+        """
+        return self.root.match(path.split("/"), 0, {})
+
+    @property
+    def urls(self):
+        return [RouterPattern(self)] + self.patterns
+
+
+class RouterPattern(RegexURLPattern):
+
+    def __init__(self, router):
+        self.router = router
+        super(RouterPattern, self).__init__(r"^", router.match)
+
+    def resolve(self, path):
+        result = self.router.match(path)
+        if result is not None:
+            (callback, name), kwargs = result
+            return ResolverMatch(callback, (), kwargs, name)
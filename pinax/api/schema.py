@@ -0,0 +1,100 @@
+from __future__ import unicode_literals
+
+from django.utils import lru_cache, six
+
+from .resource import scoped
+
+
+@lru_cache.lru_cache(maxsize=None)
+def compile_schema(resource_class):
+    return Schema(resource_class)
+
+
+class Schema(object):
+    """
+    Structural checks for resource objects in request payloads, compiled
+    once per Resource class from its `attributes`, their scopes and its
+    `relationships`. `errors()` reports every problem found in a resource
+    object as JSON:API error objects, without any database access.
+    """
+
+    def __init__(self, resource_class):
+        self.api_type = resource_class.api_type
+        self.strict = getattr(resource_class, "strict_attributes", True)
+        self.writable = frozenset(attr.name for attr in scoped(resource_class.attributes, "w"))
+        self.readable = frozenset(attr.name for attr in scoped(resource_class.attributes, "r"))
+        self.relationships = dict(
+            (name, (rel.collection, rel.api_type))
+            for name, rel in resource_class.relationships.items()
+        )
+
+    def errors(self, data, pointer="/data"):
+        errors = []
+
+        def error(detail, path=""):
+            errors.append({
+                "status": "400",
+                "detail": detail,
+                "source": {"pointer": pointer + path},
+            })
+
+        if not isinstance(data, dict):
+            error("Resource object must be an object.")
+            return errors
+        self.check_type(data, error)
+        self.check_attributes(data, error)
+        self.check_relationships(data, error)
+        return errors
+
+    def check_type(self, data, error):
+        api_type = data.get("type")
+        if api_type is not None and api_type != self.api_type:
+            error('Type "{}" does not match "{}".'.format(api_type, self.api_type), "/type")
+
+    def check_attributes(self, data, error):
+        if "attributes" not in data:
+            error('Missing "attributes" key in data.')
+        elif not isinstance(data["attributes"], dict):
+            error("Attributes must be an object.", "/attributes")
+        elif self.strict:
+            for name in data["attributes"]:
+                if name in self.writable:
+                    continue
+                if name in self.readable:
+                    error('Attribute "{}" is read-only.'.format(name), "/attributes/{}".format(name))
+                else:
+                    error('Unknown attribute "{}".'.format(name), "/attributes/{}".format(name))
+
+    def check_relationships(self, data, error):
+        relationships = data.get("relationships", {})
+        if not isinstance(relationships, dict):
+            error("Relationships must be an object.", "/relationships")
+            return
+        for name, value in relationships.items():
+            path = "/relationships/{}".format(name)
+            if name in self.relationships:
+                self.check_relationship(value, self.relationships[name], error, path)
+            elif self.strict:
+                error('Unknown relationship "{}".'.format(name), path)
+
+    def check_relationship(self, value, rel, error, path):
+        collection, api_type = rel
+        if not isinstance(value, dict) or "data" not in value:
+            error('Relationship must be an object with a "data" key.', path)
+        elif collection:
+            if not isinstance(value["data"], list):
+                error("Relationship data must be a list.", path + "/data")
+                return
+            for i, identifier in enumerate(value["data"]):
+                self.check_identifier(identifier, api_type, error, "{}/data/{}".format(path, i))
+        elif value["data"] is not None:
+            self.check_identifier(value["data"], api_type, error, path + "/data")
+
+    def check_identifier(self, identifier, api_type, error, path):
+        if not isinstance(identifier, dict) or "type" not in identifier or "id" not in identifier:
+            error('Resource identifier must be an object with "type" and "id" keys.', path)
+            return
+        if identifier["type"] != api_type:
+            error('Type "{}" does not match "{}".'.format(identifier["type"], api_type), path + "/type")
+        if isinstance(identifier["id"], bool) or not isinstance(identifier["id"], six.string_types + six.integer_types):
+            error("Resource identifier id must be a string.", path + "/id")
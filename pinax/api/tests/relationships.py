@@ -66,5 +66,17 @@ class ArticleTagCollectionEndpointSet(api.RelationshipEndpointSet):
             return self.render_delete()
 
 
+class ArticleTagStreamEndpointSet(ArticleTagCollectionEndpointSet):
+
+    def create(self, request, pk):
+        """
+        Identifier: Add tag(s) to an Article, parsing the payload incrementally
+        """
+        with self.validate(self.resource_class, collection=True, stream=True) as resources:
+            for resource in resources:
+                ArticleTag.objects.create(name=resource.obj.name, article=self.article)
+            return self.render(None)
+
+
 class ArticleAuthorEndpointSet(api.RelationshipEndpointSet):
     pass
@@ -43,6 +43,9 @@ class ArticleResource(api.Resource):
     attributes = [
         "title",
     ]
+    sortable = [
+        "title",
+    ]
     relationships = {
         "tags": api.Relationship("articletag", collection=True),
         "author": api.Relationship("author"),
@@ -0,0 +1,15 @@
+from pinax import api
+
+from .endpoints import (
+    ArticleEndpointSet,
+    ArticleTagEndpointSet,
+    AuthorEndpointSet,
+)
+
+
+router = api.Router([
+    ArticleEndpointSet,
+    ArticleTagEndpointSet,
+    AuthorEndpointSet,
+])
+urlpatterns = router.urls
@@ -1,4 +1,38 @@
+import json
+
+from mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
 from django.test import TestCase as BaseTestCase
+from django.test.utils import CaptureQueriesContext
+
+
+class EndpointTestMixin(object):
+    """
+    Helpers for tests which request the fixture endpointsets.
+    """
+
+    def authenticate_as(self, user=None):
+        """
+        Makes anonymous authentication return `user` (an AnonymousUser by
+        default) for the rest of the test. Returns the mock.
+        """
+        patcher = patch("pinax.api.authentication.Anonymous.authenticate", autospec=True)
+        authenticate = patcher.start()
+        authenticate.return_value = AnonymousUser() if user is None else user
+        self.addCleanup(patcher.stop)
+        return authenticate
+
+    def use_middleware(self, endpointset, **middleware):
+        """
+        Replaces entries of `endpointset.middleware` (i.e. `permissions` or
+        `pre`) for the rest of the test, with chains compiled afresh.
+        """
+        for attr, value in [("middleware", dict(endpointset.middleware, **middleware)), ("chains", {})]:
+            patcher = patch.object(endpointset, attr, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
 
 class TestCase(BaseTestCase):
@@ -23,3 +57,53 @@ class TestCase(BaseTestCase):
                 "Resource {} is missing from second list".format(resource_id)
             )
             self.assertEqual(a_graph[resource_id], b_graph[resource_id])
+
+    def assertMaxQueries(self, url, num, data=None, **extra):
+        """
+        GET `url` and fail if more than `num` queries are executed.
+        Returns the response.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, data, **extra)
+        self.assertTrue(
+            len(context) <= num,
+            "{} queries executed, at most {} expected:\n{}".format(
+                len(context),
+                num,
+                "\n".join(query["sql"] for query in context.captured_queries),
+            )
+        )
+        return response
+
+    def assertConstantQueries(self, url, page_sizes=(1, 10), data=None, **extra):
+        """
+        GET list endpoint `url` at two page sizes and fail if the number of
+        queries grows with the number of resources returned (N+1 queries).
+        """
+        counts = []
+        for page_size in page_sizes:
+            params = dict(data or {})
+            params["page[size]"] = page_size
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, params, **extra)
+            payload = json.loads(response.content.decode("utf-8"))
+            counts.append((len(payload.get("data", [])), len(context)))
+        (small_items, small_queries), (large_items, large_queries) = counts
+        self.assertNotEqual(
+            small_items,
+            large_items,
+            "Page sizes {} returned the same number of resources ({}); create more fixtures".format(
+                page_sizes,
+                small_items,
+            )
+        )
+        self.assertEqual(
+            small_queries,
+            large_queries,
+            "Query count grew with page size: {} queries for {} resources, {} queries for {} resources".format(
+                small_queries,
+                small_items,
+                large_queries,
+                large_items,
+            )
+        )
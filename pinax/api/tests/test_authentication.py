@@ -0,0 +1,84 @@
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from ..authentication import Cached, authenticate
+from ..exceptions import AuthenticationFailed
+from .test import TestCase
+
+
+class TokenBackend(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def authenticate(self, request):
+        self.calls += 1
+        token = request.META.get("HTTP_AUTHORIZATION")
+        if token == "bad":
+            raise AuthenticationFailed("Invalid token.")
+        if token:
+            return User.objects.get(username=token)
+
+
+class CachedAuthenticationTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="token")
+        self.backend = TokenBackend()
+        self.cached = Cached(self.backend)
+        self.factory = RequestFactory()
+
+    def request(self, token=None):
+        if token is None:
+            return self.factory.get("/")
+        return self.factory.get("/", HTTP_AUTHORIZATION=token)
+
+    def test_user_is_cached_per_credential(self):
+        self.assertEqual(self.cached.authenticate(self.request("token")), self.user)
+        self.assertEqual(self.cached.authenticate(self.request("token")), self.user)
+        self.assertEqual(self.backend.calls, 1)
+
+    def test_cache_key_hashes_credential(self):
+        self.assertNotIn("token", self.cached.cache_key("token").split(":")[-1])
+
+    def test_revoke(self):
+        self.cached.authenticate(self.request("token"))
+        self.cached.revoke("token")
+        self.cached.authenticate(self.request("token"))
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_missing_credential_not_cached(self):
+        self.assertIsNone(self.cached.authenticate(self.request()))
+        self.assertIsNone(self.cached.authenticate(self.request()))
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_failure_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.cached.authenticate(self.request("bad"))
+        self.assertEqual(self.backend.calls, 2)
+
+
+class AuthenticateOncePerRequestTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="token")
+        self.backend = TokenBackend()
+        self.factory = RequestFactory()
+
+    def test_backend_evaluated_once(self):
+        request = self.factory.get("/", HTTP_AUTHORIZATION="token")
+        self.assertEqual(authenticate(self.backend, request), self.user)
+        self.assertEqual(authenticate(self.backend, request), self.user)
+        self.assertEqual(self.backend.calls, 1)
+
+    def test_failure_evaluated_once(self):
+        request = self.factory.get("/", HTTP_AUTHORIZATION="bad")
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                authenticate(self.backend, request)
+        self.assertEqual(self.backend.calls, 1)
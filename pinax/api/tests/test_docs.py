@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+
+import json
+
+from mock import patch
+
+from django.test import RequestFactory, override_settings
+
+from pinax.api.docs import doc_view, openapi_view
+
+from .endpoints import ArticleEndpointSet
+from .test import TestCase
+
+
+class API:
+    """
+    Articles and their tags.
+    """
+    name = "Test API"
+    endpointsets = [
+        ArticleEndpointSet,
+    ]
+
+    def __iter__(self):
+        return iter(self.endpointsets)
+
+
+class DocViewTestCase(TestCase):
+
+    def setUp(self):
+        docs = patch.object(ArticleEndpointSet, "docs", {"verbose_name": "Article", "verbose_name_plural": "Articles"}, create=True)
+        docs.start()
+        self.addCleanup(docs.stop)
+        self.factory = RequestFactory()
+
+    def test_blueprint(self):
+        view = doc_view(API)
+        response = view(self.factory.get("/docs"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/vnd.apiblueprint")
+        content = response.content.decode("utf-8")
+        self.assertIn("HOST: http://testserver", content)
+        self.assertIn("## Article [/articles/{id}]", content)
+        self.assertIn("### Retrieve an Article [GET]", content)
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "example.com"])
+    def test_rendered_once_per_host(self):
+        with patch("pinax.api.docs.DocumentationGenerator.render", autospec=True, return_value="doc") as render:
+            view = doc_view(API)
+            view(self.factory.get("/docs"))
+            view(self.factory.get("/docs"))
+            view(self.factory.get("/docs", HTTP_HOST="example.com"))
+        self.assertEqual(render.call_count, 2)
+
+    def test_etag(self):
+        view = doc_view(API)
+        response = view(self.factory.get("/docs"))
+        etag = response["ETag"]
+        response = view(self.factory.get("/docs", HTTP_IF_NONE_MATCH='"other", {}'.format(etag)))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_openapi(self):
+        view = openapi_view(API)
+        response = view(self.factory.get("/openapi.json"))
+        self.assertEqual(response["Content-Type"], "application/vnd.oai.openapi+json")
+        doc = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(doc["openapi"], "3.0.0")
+        self.assertEqual(doc["info"]["title"], "Test API")
+        self.assertEqual(doc["info"]["description"], "Articles and their tags.")
+        self.assertEqual(doc["servers"], [{"url": "http://testserver"}])
+        self.assertEqual(sorted(doc["paths"]["/articles"]), ["get", "post"])
+        detail = doc["paths"]["/articles/{id}"]
+        self.assertEqual(detail["parameters"][0]["name"], "id")
+        self.assertEqual(detail["get"]["summary"], "Retrieve an Article")
+        self.assertEqual(detail["get"]["tags"], ["Articles"])
+        self.assertIn("/articles/{id}/relationships/tags", doc["paths"])
@@ -0,0 +1,146 @@
+from __future__ import unicode_literals
+
+import json
+
+from mock import patch
+
+from django.core.urlresolvers import reverse
+
+from pinax.api import encoders
+from pinax.api.encoders import json_codec, msgpack_codec, negotiate, packb, unpackb
+
+from .models import Article, Author
+from .test import EndpointTestMixin, TestCase
+
+
+class PackTestCase(TestCase):
+
+    def assertRoundTrip(self, value):
+        self.assertEqual(unpackb(packb(value)), value)
+
+    def test_scalars(self):
+        for value in [None, True, False, 0.5, -1.25e100, "", "jsonapi", "é中", b"\x00\xff"]:
+            self.assertRoundTrip(value)
+
+    def test_integer_sizes(self):
+        for value in [0, 127, 128, 255, 256, 65535, 65536, 2 ** 32, 2 ** 64 - 1, -1, -32, -33, -128, -129, -32769, -2 ** 31 - 1, -2 ** 63]:
+            self.assertRoundTrip(value)
+        self.assertEqual(packb(5), b"\x05")
+        self.assertEqual(packb(-5), b"\xfb")
+        self.assertEqual(packb(200), b"\xcc\xc8")
+        with self.assertRaises(OverflowError):
+            packb(2 ** 64)
+
+    def test_container_sizes(self):
+        for size in [0, 15, 16, 65535, 65536]:
+            self.assertRoundTrip(list(range(size)))
+            self.assertRoundTrip(dict(("k{}".format(i), i) for i in range(size)))
+        for size in [31, 32, 255, 256, 65536]:
+            self.assertRoundTrip("x" * size)
+
+    def test_document(self):
+        document = {
+            "data": [{"type": "article", "id": "1", "attributes": {"title": "Title", "score": 1.5, "draft": False}}],
+            "links": {"next": None},
+            "meta": {"count": 1},
+        }
+        self.assertEqual(unpackb(packb(document)), json.loads(json.dumps(document)))
+
+    def test_invalid(self):
+        for data in [b"", b"\xc1", b"\xa3ab", b"\x92\x01", b"\x01\x02"]:
+            with self.assertRaises(ValueError):
+                unpackb(data)
+        with self.assertRaises(TypeError):
+            packb(object())
+
+    def test_unhashable_key(self):
+        with self.assertRaises(ValueError):
+            unpackb(b"\x81\x91\x01\x01")
+
+    def test_non_string_key(self):
+        for key in [1, b"key", None, 0.5]:
+            with self.assertRaises(ValueError):
+                unpackb(packb({key: 1}))
+
+    def test_max_depth(self):
+        self.assertEqual(unpackb(b"\x91" * 3 + b"\xc0", max_depth=3), [[[None]]])
+        with self.assertRaises(ValueError):
+            unpackb(b"\x91" * 4 + b"\xc0", max_depth=3)
+        with self.assertRaises(ValueError):
+            unpackb(b"\x91" * 100000 + b"\xc0")
+
+    def test_codec_without_msgpack(self):
+        with patch.object(encoders, "msgpack", None):
+            self.assertEqual(msgpack_codec.loads(msgpack_codec.dumps({"a": [1]})), {"a": [1]})
+
+
+class JSONCodecTestCase(TestCase):
+
+    def test_dumps_bytes(self):
+        self.assertEqual(json_codec.dumps({"b": 1, "a": "é"}), '{"a": "\\u00e9", "b": 1}'.encode("utf-8"))
+
+
+class NegotiateTestCase(TestCase):
+
+    def test_negotiate(self):
+        self.assertIs(negotiate(""), json_codec)
+        self.assertIs(negotiate("*/*"), json_codec)
+        self.assertIs(negotiate("text/html"), json_codec)
+        self.assertIs(negotiate("application/msgpack"), msgpack_codec)
+        self.assertIs(negotiate("application/x-msgpack, */*"), msgpack_codec)
+        self.assertIs(negotiate("application/msgpack;q=0.5, application/vnd.api+json"), json_codec)
+        self.assertIs(negotiate("application/vnd.api+json;q=0.1, application/msgpack;q=0.9"), msgpack_codec)
+
+
+class MessagePackEndpointTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Author")
+        self.authenticate_as()
+
+    def test_get(self):
+        article = Article.objects.create(title="Packed", author=self.author)
+        url = reverse("article-detail", kwargs=dict(pk=article.pk))
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertIn("Accept", response["Vary"])
+        packed = msgpack_codec.loads(response.content)
+        self.assertEqual(packed, json.loads(self.client.get(url).content.decode("utf-8")))
+        self.assertEqual(packed["data"]["attributes"]["title"], "Packed")
+
+    def test_post(self):
+        payload = {
+            "data": {
+                "type": "article",
+                "attributes": {"title": "Sent packed"},
+                "relationships": {"author": {"data": {"type": "author", "id": str(self.author.pk)}}},
+            },
+        }
+        response = self.client.post(
+            reverse("article-list"),
+            data=msgpack_codec.dumps(payload),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/vnd.api+json")
+        self.assertEqual(Article.objects.get().title, "Sent packed")
+
+    def test_malformed_bodies(self):
+        for data in [b"\x81\x91\x01\x01", b"\x91" * 100000 + b"\xc0"]:
+            response = self.client.post(reverse("article-list"), data=data, content_type="application/msgpack")
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("article-list"), data="[" * 100000, content_type="application/vnd.api+json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_errors_follow_accept(self):
+        response = self.client.post(
+            reverse("article-list"),
+            data=b"\xc1",
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        error = msgpack_codec.loads(response.content)["errors"][0]
+        self.assertEqual(error["title"], "Invalid MessagePack")
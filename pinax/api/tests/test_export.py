@@ -0,0 +1,85 @@
+from __future__ import unicode_literals
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils.six import StringIO
+
+from pinax.api.export import Export, pk_ranges
+
+from .models import Article, Author
+from .test import TestCase
+
+
+class ExportCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        author = Author.objects.create(name="Author")
+        self.articles = [Article.objects.create(title="Article {}".format(i), author=author) for i in range(5)]
+
+    def export(self, *args, **options):
+        out = StringIO()
+        options.setdefault("workers", 1)
+        call_command("pinax_api_export", "article", *args, output=self.directory, chunk_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def read(self, name):
+        with gzip.open(os.path.join(self.directory, name), "rb") as fp:
+            return [json.loads(line) for line in fp.read().decode("utf-8").splitlines()]
+
+    def test_ndjson(self):
+        output = self.export()
+        self.assertIn("[3/3]", output)
+        lines = self.read("article-00000.ndjson.gz") + self.read("article-00001.ndjson.gz") + self.read("article-00002.ndjson.gz")
+        self.assertEqual([line["id"] for line in lines], [str(a.pk) for a in self.articles])
+        self.assertEqual(lines[0]["attributes"], {"title": "Article 0"})
+        self.assertEqual(lines[0]["links"]["self"], "/articles/{}".format(self.articles[0].pk))
+
+    def test_workers(self):
+        output = self.export(workers=2)
+        self.assertIn("[3/3]", output)
+        lines = self.read("article-00000.ndjson.gz") + self.read("article-00001.ndjson.gz") + self.read("article-00002.ndjson.gz")
+        self.assertEqual([line["id"] for line in lines], [str(a.pk) for a in self.articles])
+
+    def test_jsonapi_uncompressed(self):
+        self.export(format="jsonapi", compress=False)
+        with open(os.path.join(self.directory, "article-00002.json")) as fp:
+            document = json.load(fp)
+        self.assertEqual([r["id"] for r in document["data"]], [str(self.articles[4].pk)])
+
+    def test_resume(self):
+        self.export()
+        os.remove(os.path.join(self.directory, "article-00001.ndjson.gz"))
+        Article.objects.filter(pk=self.articles[0].pk).update(title="Changed")
+        output = self.export()
+        self.assertIn("Resuming: 2 of 3 chunks already exported.", output)
+        self.assertIn("[3/3]", output)
+        # finished chunks are kept as they were
+        self.assertEqual(self.read("article-00000.ndjson.gz")[0]["attributes"]["title"], "Article 0")
+        self.assertEqual(len(self.read("article-00001.ndjson.gz")), 2)
+        with self.assertRaises(CommandError):
+            self.export(format="jsonapi")
+        for name in ["article-notes.txt", "article-0001.json", "articles-00001.json"]:
+            open(os.path.join(self.directory, name), "w").close()
+        self.export(format="jsonapi", restart=True)
+        for name in ["article-notes.txt", "article-0001.json", "articles-00001.json"]:
+            self.assertTrue(os.path.exists(os.path.join(self.directory, name)))
+        self.assertEqual(sorted(os.listdir(self.directory))[0], "article-00000.json.gz")
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "article-00000.ndjson.gz")))
+
+    def test_unknown_type(self):
+        with self.assertRaises(CommandError):
+            call_command("pinax_api_export", "unknown", output=self.directory, stdout=StringIO())
+
+    def test_pk_ranges(self):
+        pks = [a.pk for a in self.articles]
+        self.assertEqual(pk_ranges(Article.objects.all(), 2), [(pks[0], pks[2]), (pks[2], pks[4]), (pks[4], None)])
+        self.assertEqual(pk_ranges(Article.objects.none(), 2), [])
+        self.assertEqual(Export("article", self.directory).chunk_path(3), os.path.join(self.directory, "article-00003.ndjson.gz"))
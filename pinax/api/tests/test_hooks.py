@@ -0,0 +1,117 @@
+from __future__ import unicode_literals
+
+from mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.urlresolvers import reverse
+from django.test import RequestFactory
+
+from pinax import api
+from pinax.api.exceptions import ErrorResponse
+
+from .endpoints import ArticleEndpointSet
+from .test import EndpointTestMixin, TestCase
+
+
+class ChainTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        self.authenticate_as()
+        self.calls = []
+
+    def test_chains_compiled_with_urls(self):
+        reverse("article-list")  # load URLconf
+        self.assertIn("list", ArticleEndpointSet.chains)
+        chain = ArticleEndpointSet.get_chain("list")
+        self.assertIs(chain, ArticleEndpointSet.get_chain("list"))
+        self.assertEqual(chain.authentication, ArticleEndpointSet.middleware["authentication"])
+        self.assertEqual(chain.permissions, [])
+
+    def test_pre_hook_rejects_request(self):
+        def reject(request, view):
+            self.calls.append(view.requested_method)
+            raise ErrorResponse(**view.error_response_kwargs("Slow down.", status=429))
+
+        self.use_middleware(ArticleEndpointSet, pre=[reject])
+        with patch.object(ArticleEndpointSet, "prepare") as prepare:
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.calls, ["list"])
+        self.assertFalse(prepare.called)
+
+    def test_post_hook_sees_error_responses(self):
+        def audit(request, view, response):
+            self.calls.append(response.status_code)
+            response["X-Audited"] = "yes"
+
+        self.use_middleware(ArticleEndpointSet, post=[audit])
+        response = self.client.get(reverse("article-detail", kwargs=dict(pk=1)))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response["X-Audited"], "yes")
+        self.assertEqual(self.calls, [404])
+
+    def test_endpoint_hooks_come_first(self):
+        def endpoint_hook(request, view):
+            self.calls.append("endpoint")
+
+        def class_hook(request, view):
+            self.calls.append("class")
+
+        @api.hooks.pre([endpoint_hook])
+        def list(self, request):
+            return self.render(self.resource_class.from_queryset(self.get_queryset()))
+
+        self.use_middleware(ArticleEndpointSet, pre=[class_hook])
+        with patch.object(ArticleEndpointSet, "list", list):
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.calls, ["endpoint", "class"])
+
+    def test_chain_keyed_by_mapping_name(self):
+        """
+        Ensure endpoint permissions survive decorators which do not copy
+        the wrapped function's name.
+        """
+        def deny(request, view):
+            return False
+
+        def logged(func):
+            def wrapper(self, request):
+                self.calls = ["logged"]
+                return func(self, request)
+            return wrapper
+
+        @api.permissions.add([deny])
+        @logged
+        def list(self, request):
+            return self.render(self.resource_class.from_queryset(self.get_queryset()))
+
+        with patch.object(ArticleEndpointSet, "list", list), patch.object(ArticleEndpointSet, "chains", {}, create=True):
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_chain_errors_are_handled(self):
+        with patch.object(ArticleEndpointSet, "chains", {}, create=True), \
+                patch("pinax.api.endpoints.Chain.build", side_effect=ValueError("broken middleware")):
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response["Content-Type"], "application/vnd.api+json")
+
+    def test_checks_outside_dispatch(self):
+        """
+        Ensure check_permissions() builds a chain for `endpoint` when
+        called without dispatch().
+        """
+        def deny(request, view):
+            return False
+
+        @api.permissions.add([deny])
+        def endpoint(self, request):
+            pass
+
+        endpointset = ArticleEndpointSet()
+        endpointset.request = RequestFactory().get("/")
+        endpointset.request.user = AnonymousUser()
+        with self.assertRaises(ErrorResponse):
+            endpointset.check_permissions(endpoint)
+        endpointset.check_permissions(ArticleEndpointSet.list)
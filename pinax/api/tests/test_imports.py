@@ -0,0 +1,34 @@
+from __future__ import unicode_literals
+
+import subprocess
+import sys
+
+from pinax import api
+
+from .test import TestCase
+
+
+class LazyImportTestCase(TestCase):
+
+    def test_import_is_lightweight(self):
+        """
+        Ensure `import pinax.api` does not load views, resources or django.test.
+        """
+        output = subprocess.check_output([
+            sys.executable,
+            "-c",
+            "import sys, pinax.api; print(' '.join(sorted(sys.modules)))",
+        ])
+        modules = output.decode("ascii").split()
+        self.assertIn("pinax.api.registry", modules)
+        for module in ["django.test", "pinax.api.endpoints", "pinax.api.resource", "pinax.api.tests.test"]:
+            self.assertNotIn(module, modules)
+
+    def test_exports(self):
+        self.assertIs(api.TestCase, TestCase)
+        self.assertIs(api.url, api.urls.URL)
+        self.assertIsInstance(api.registry, dict)
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            api.does_not_exist
@@ -0,0 +1,75 @@
+from __future__ import unicode_literals
+
+import socket
+
+from mock import patch
+
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+
+from ..instrumentation import Instrumentation, MemorySink, StatsdSink
+from .models import (
+    Article,
+    Author,
+)
+from .test import EndpointTestMixin, TestCase
+
+
+class InstrumentationTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        Article.objects.create(title="Article", author=author)
+        self.sink = MemorySink()
+        self.authenticate_as()
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_server_timing_header(self):
+        with override_settings(PINAX_API_INSTRUMENTATION=True, PINAX_API_INSTRUMENTATION_SINKS=[self.sink]):
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 200)
+        names = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+        self.assertEqual(
+            names,
+            ["authentication", "prepare", "permissions", "serialize", "encode", "endpoint", "db", "total"]
+        )
+
+    def test_nested_phases_exclusive(self):
+        # start, endpoint start, serialize start, serialize end, endpoint end
+        with patch("pinax.api.instrumentation.default_timer", side_effect=[0.0, 1.0, 1.5, 1.75, 4.0]):
+            instrumentation = Instrumentation(None)
+            with instrumentation.phase("endpoint"):
+                with instrumentation.phase("serialize"):
+                    pass
+        instrumentation._queries.__exit__(None, None, None)
+        self.assertEqual(instrumentation.timings, {"serialize": 250.0, "endpoint": 2750.0})
+
+    def test_sink_records_queries(self):
+        with override_settings(PINAX_API_INSTRUMENTATION=True, PINAX_API_INSTRUMENTATION_SINKS=[self.sink]):
+            self.client.get(reverse("article-list"))
+        self.assertEqual(len(self.sink.records), 1)
+        record = self.sink.records[0]
+        self.assertEqual(record.name, "ArticleEndpointSet")
+        self.assertEqual(record.method, "list")
+        self.assertEqual(record.response.status_code, 200)
+        self.assertGreater(record.queries, 0)
+
+    def test_statsd_sink(self):
+        """
+        Ensure metrics reach a local UDP listener standing in for statsd.
+        """
+        listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        listener.bind(("127.0.0.1", 0))
+        listener.settimeout(1)
+        self.addCleanup(listener.close)
+        sink = StatsdSink(host="127.0.0.1", port=listener.getsockname()[1], prefix="test")
+        with override_settings(PINAX_API_INSTRUMENTATION=True, PINAX_API_INSTRUMENTATION_SINKS=[sink]):
+            self.client.get(reverse("article-list"))
+        packet = listener.recv(65535).decode("ascii")
+        metrics = dict(line.split(":", 1) for line in packet.splitlines())
+        self.assertIn("test.ArticleEndpointSet.list.endpoint", metrics)
+        self.assertTrue(metrics["test.ArticleEndpointSet.list.queries"].endswith("|g"))
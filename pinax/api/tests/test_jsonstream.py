@@ -0,0 +1,140 @@
+from __future__ import unicode_literals
+
+import io
+import json
+
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+
+from pinax.api.exceptions import PayloadTooLarge
+from pinax.api.jsonstream import DocumentStream
+
+from .models import Article, ArticleTag, Author
+from .test import EndpointTestMixin, TestCase
+
+
+def stream(text, **kwargs):
+    kwargs.setdefault("chunk_size", 3)
+    return DocumentStream(io.BytesIO(text.encode("utf-8")), **kwargs)
+
+
+class DocumentStreamTestCase(TestCase):
+
+    def test_elements(self):
+        document = stream('{"meta": {"n": 12345}, "data": [{"id": "1"}, 42, "été"], "jsonapi": {}}')
+        self.assertTrue(document.open())
+        self.assertEqual(list(document.elements()), [{"id": "1"}, 42, "été"])
+        self.assertEqual(document.document, {"meta": {"n": 12345}, "jsonapi": {}})
+
+    def test_numbers_split_across_chunks(self):
+        document = stream('{"data": [1234567, 89]}', chunk_size=4)
+        self.assertTrue(document.open())
+        self.assertEqual(list(document.elements()), [1234567, 89])
+
+    def test_empty_list(self):
+        document = stream('{"data": []}')
+        self.assertTrue(document.open())
+        self.assertEqual(list(document.elements()), [])
+
+    def test_data_not_a_list(self):
+        document = stream('{"data": {"id": "1"}}')
+        self.assertFalse(document.open())
+        self.assertEqual(document.document, {"data": {"id": "1"}})
+
+    def test_invalid_json(self):
+        document = stream('{"data": [{"id": "1"}, {"id": }]}')
+        self.assertTrue(document.open())
+        elements = document.elements()
+        self.assertEqual(next(elements), {"id": "1"})
+        with self.assertRaises(ValueError):
+            next(elements)
+
+    def test_element_spanning_chunks(self):
+        element = {"id": "1", "attributes": {"tag": "a \\\"quoted\\\" [tag]", "list": [[1, {}], "}"]}}
+        document = stream(json.dumps({"data": [element, element]}), chunk_size=2)
+        self.assertTrue(document.open())
+        self.assertEqual(list(document.elements()), [element, element])
+
+    def test_stops_at_first_error(self):
+        text = '{"data": [{"id": "1"}, {"id": "2"]' + ", 1" * 1000 + "]}"
+        body = io.BytesIO(text.encode("utf-8"))
+        document = DocumentStream(body, chunk_size=8)
+        self.assertTrue(document.open())
+        elements = document.elements()
+        self.assertEqual(next(elements), {"id": "1"})
+        with self.assertRaises(ValueError):
+            next(elements)
+        self.assertLess(body.tell(), 64)
+
+    def test_unexpected_character(self):
+        document = stream('{"data": [[1, @]]}')
+        self.assertTrue(document.open())
+        with self.assertRaises(ValueError):
+            list(document.elements())
+
+    def test_truncated(self):
+        for text in ['{"data": [{"id": "1"', '{"data": ["abc', '{"data": [12']:
+            document = stream(text)
+            self.assertTrue(document.open())
+            with self.assertRaises(ValueError):
+                list(document.elements())
+
+    def test_extra_data(self):
+        document = stream('{"data": []} []')
+        self.assertTrue(document.open())
+        with self.assertRaises(ValueError):
+            list(document.elements())
+
+    def test_max_size(self):
+        document = stream('{"data": [1, 2, 3, 4]}', max_size=16)
+        self.assertTrue(document.open())
+        with self.assertRaises(PayloadTooLarge):
+            list(document.elements())
+
+
+class StreamingValidateTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        self.article = Article.objects.create(title="Article", author=author)
+        self.url = reverse("article-tags-stream-relationship-detail", kwargs=dict(pk=self.article.pk))
+        self.authenticate_as()
+
+    def post(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        return self.client.post(self.url, data=data, content_type="application/vnd.api+json")
+
+    def test_streamed_collection(self):
+        payload = {
+            "data": [
+                {"type": "articletag", "attributes": {"tag": "tag{}".format(i)}}
+                for i in range(50)
+            ]
+        }
+        response = self.post(payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ArticleTag.objects.filter(article=self.article).count(), 50)
+
+    def test_missing_data(self):
+        response = self.post({"meta": {}})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.content.decode("utf-8"))["errors"][0]["detail"],
+            'Missing "data" key in payload.'
+        )
+
+    def test_data_not_a_list(self):
+        response = self.post({"data": {"type": "articletag", "attributes": {"tag": "one"}}})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Data must be in a list.", response.content.decode("utf-8"))
+
+    def test_invalid_json(self):
+        response = self.post('{"data": [{"type": "articletag", "attributes": {"tag": "one"}}, {')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content.decode("utf-8"))["errors"][0]["title"], "Invalid JSON")
+
+    @override_settings(PINAX_API_MAX_BODY_SIZE=64)
+    def test_max_body_size(self):
+        response = self.post({"data": [{"type": "articletag", "attributes": {"tag": "one"}}] * 5})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(ArticleTag.objects.count(), 0)
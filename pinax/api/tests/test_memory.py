@@ -0,0 +1,90 @@
+from __future__ import unicode_literals
+
+import json
+import unittest
+import warnings
+
+from mock import patch
+
+from django.apps import apps
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+
+from ..exceptions import NPlusOneWarning
+from ..memory import MemoryTracker, get_memory_tracker, null_memory_tracker, tracemalloc
+from .models import Article, Author
+from .test import EndpointTestMixin, TestCase
+
+
+@unittest.skipIf(tracemalloc is None, "tracemalloc requires Python 3")
+class MemoryTrackingTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        if not tracemalloc.is_tracing():
+            # tracing slows every allocation; keep it to these tests
+            self.addCleanup(tracemalloc.stop)
+        author = Author.objects.create(name="Author")
+        for i in range(3):
+            Article.objects.create(title="Article {}".format(i), author=author)
+        self.authenticate_as()
+
+    def test_disabled_by_default(self):
+        self.assertIs(get_memory_tracker(None), null_memory_tracker)
+        response = self.client.get(reverse("article-list"))
+        self.assertNotIn("X-Pinax-Memory", response)
+
+    def test_tracking(self):
+        with override_settings(PINAX_API_MEMORY_TRACKING=True, PINAX_API_DEBUG=True), warnings.catch_warnings():
+            warnings.simplefilter("ignore", NPlusOneWarning)
+            with patch("pinax.api.memory.logger") as logger:
+                response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [metric.split(";")[0] for metric in response["X-Pinax-Memory"].split(", ")],
+            ["serialize", "encode"]
+        )
+        self.assertIn("ArticleEndpointSet.list peak=", logger.info.call_args[0][0])
+        # tracing is process-wide and outlives the request
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_header_only_in_debug(self):
+        with override_settings(PINAX_API_MEMORY_TRACKING=True):
+            with patch("pinax.api.memory.logger") as logger:
+                response = self.client.get(reverse("article-list"))
+        self.assertTrue(logger.info.called)
+        self.assertNotIn("X-Pinax-Memory", response)
+
+    def test_budget_exceeded(self):
+        with override_settings(PINAX_API_MEMORY_BUDGET=1), patch("pinax.api.endpoints.logger") as logger:
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 500)
+        self.assertTrue(logger.warning.called)
+        error = json.loads(response.content.decode("utf-8"))["errors"][0]
+        self.assertEqual(error["title"], "Memory Budget Exceeded")
+        with override_settings(PINAX_API_MEMORY_BUDGET=1, PINAX_API_MEMORY_BUDGET_STATUS=413), patch("pinax.api.endpoints.logger"):
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 413)
+
+    def test_budget_not_exceeded(self):
+        with override_settings(PINAX_API_MEMORY_BUDGET=50 * 1024 * 1024):
+            response = self.client.get(reverse("article-list"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_top_sites(self):
+        tracker = MemoryTracker(None, top=3, report=False)
+        with tracker.phase("serialize"):
+            data = [str(i) * 100 for i in range(1000)]
+        tracker.finish(None)
+        self.assertGreater(tracker.peaks["serialize"], 100 * 1000)
+        self.assertEqual(len(tracker.sites), 3)
+        self.assertEqual(tracker.sites[0][0], "test_memory.py")
+        del data
+
+    def test_started_at_startup(self):
+        config = apps.get_app_config("pinax_api")
+        with patch("pinax.api.memory.start_tracing") as start_tracing:
+            config.ready()
+            self.assertFalse(start_tracing.called)
+            with override_settings(PINAX_API_MEMORY_BUDGET=1024):
+                config.ready()
+        start_tracing.assert_called_once_with()
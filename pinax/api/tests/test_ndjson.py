@@ -0,0 +1,135 @@
+from __future__ import unicode_literals
+
+import json
+
+from mock import patch
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from pinax.api.resource import iterate_chunks
+
+from .endpoints import ArticleEndpointSet
+from .models import Article, ArticleTag, Author
+from .test import EndpointTestMixin, TestCase
+from .test_permissions import BatchPublicArticles, PublicArticles
+
+
+class NDJSONTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Author")
+        self.articles = [
+            Article.objects.create(title=title, author=self.author)
+            for title in ["Public b", "Private", "Public a", "Public c"]
+        ]
+        ArticleTag.objects.create(name="pinax", article=self.articles[2])
+        self.authenticate_as()
+        for attr, value in [("allow_stream", True), ("stream_chunk_size", 2)]:
+            patcher = patch.object(ArticleEndpointSet, attr, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stream(self, data=None, **extra):
+        response = self.client.get(reverse("article-list"), data, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertTrue(content.endswith("\n"))
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_format_param(self):
+        lines = self.stream({"format": "ndjson"})
+        self.assertEqual([line["id"] for line in lines], [str(a.pk) for a in self.articles])
+        self.assertEqual(lines[0]["attributes"], {"title": "Public b"})
+        self.assertEqual(lines[0]["links"]["self"], "http://testserver/articles/{}".format(self.articles[0].pk))
+
+    def test_accept_header(self):
+        lines = self.stream(HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(len(lines), 4)
+
+    def test_filter_and_sort(self):
+        lines = self.stream({"format": "ndjson", "sort": "-title"})
+        self.assertEqual([line["attributes"]["title"] for line in lines], ["Public c", "Public b", "Public a", "Private"])
+        lines = self.stream({"format": "ndjson", "tag": "pinax"})
+        self.assertEqual([line["id"] for line in lines], [str(self.articles[2].pk)])
+
+    def test_permissions(self):
+        self.use_middleware(ArticleEndpointSet, permissions=[PublicArticles()])
+        self.assertEqual(len(self.stream({"format": "ndjson"})), 3)
+        perm = BatchPublicArticles()
+        self.use_middleware(ArticleEndpointSet, permissions=[perm])
+        self.assertEqual(len(self.stream({"format": "ndjson"})), 3)
+        self.assertEqual(perm.calls, 2)
+
+    def test_errors(self):
+        for params in [{"format": "ndjson", "sort": "author"}, {"format": "ndjson", "include": "author"}]:
+            response = self.client.get(reverse("article-list"), params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response["Content-Type"], "application/vnd.api+json")
+
+    def test_not_allowed(self):
+        with patch.object(ArticleEndpointSet, "allow_stream", False):
+            response = self.client.get(reverse("article-list"), {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/vnd.api+json")
+        self.assertEqual(len(json.loads(response.content.decode("utf-8"))["data"]), 4)
+
+    def test_detail_not_streamed(self):
+        response = self.client.get(reverse("article-detail", kwargs=dict(pk=self.articles[0].pk)), {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/vnd.api+json")
+
+
+class IterateChunksTestCase(TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        for title in "edcbaacd":
+            Article.objects.create(title=title, author=author)
+
+    def chunks(self, qs, chunk_size):
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(iterate_chunks(qs, chunk_size))
+        return chunks, [query["sql"] for query in queries.captured_queries]
+
+    def test_by_key(self):
+        chunks, sql = self.chunks(Article.objects.order_by("pk"), 3)
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 2])
+        self.assertEqual([a.title for chunk in chunks for a in chunk], list("edcbaacd"))
+        self.assertFalse(any("OFFSET" in query for query in sql))
+
+    def test_by_sort_key(self):
+        expected = list(Article.objects.order_by("-title", "pk"))
+        for chunk_size in [1, 2, 3, 8]:
+            chunks, sql = self.chunks(Article.objects.order_by("-title"), chunk_size)
+            self.assertEqual([a for chunk in chunks for a in chunk], expected)
+            self.assertFalse(any("OFFSET" in query for query in sql))
+
+    def test_related_sort_key(self):
+        expected = list(Article.objects.order_by("author__name", "-pk"))
+        chunks, sql = self.chunks(Article.objects.order_by("author__name", "-pk"), 3)
+        self.assertEqual([a for chunk in chunks for a in chunk], expected)
+
+    def test_nullable_sort_key(self):
+        """
+        Ensure rows whose sort key is NULL are not skipped.
+        """
+        Article.objects.all().delete()
+        for name in "wxyz":
+            author = Author.objects.create(name=name)
+            if name in "wx":
+                Article.objects.create(title=name, author=author)
+        for ordering in ["article__title", "-article__title"]:
+            qs = Author.objects.filter(name__in="wxyz").order_by(ordering)
+            self.assertIn(None, list(qs.values_list("article__title", flat=True)))
+            expected = list(qs.order_by(ordering, "pk"))
+            self.assertEqual(len(expected), 4)
+            for chunk_size in [1, 3]:
+                chunks, sql = self.chunks(qs, chunk_size)
+                self.assertEqual([a for chunk in chunks for a in chunk], expected)
+
+    def test_expression_order(self):
+        chunks, sql = self.chunks(Article.objects.order_by(F("pk").desc()), 3)
+        self.assertEqual([a for chunk in chunks for a in chunk], list(Article.objects.order_by("-pk")))
+        self.assertTrue(any("OFFSET" in query for query in sql))
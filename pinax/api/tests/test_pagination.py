@@ -1,16 +1,22 @@
 from __future__ import unicode_literals
 
-from django.core.paginator import EmptyPage
+import json
+
+from mock import patch
+
 from django.core.urlresolvers import reverse
 from django.test import RequestFactory
 
+from ..exceptions import SerializationError
 from ..jsonapi import TopLevel
 from .. import registry
+from ..pagination import CursorPaginator
+from .endpoints import ArticleEndpointSet
 from .models import (
     Article,
     Author,
 )
-from .test import TestCase
+from .test import EndpointTestMixin, TestCase
 
 
 class TestPagination(TestCase):
@@ -211,18 +217,22 @@ class TestPaginationPageSize(TestCase):
 
     def test_page_size_zero(self):
         """
-        Verify if page[size] == 0, all items are returned anyway.
+        Verify page[size] == 0 is rejected unless pagination may be disabled.
+        """
+        self.request.GET["page[size]"] = 0
+        with self.assertRaises(SerializationError):
+            self.top_level.serializable(request=self.request)
+
+    def test_page_size_zero_unpaginated(self):
+        """
+        Verify if page[size] == 0 and pagination may be disabled, all items
+        are returned without paginator meta-data.
         """
         self.request.GET["page[size]"] = 0
+        self.top_level.allow_unpaginated = True
         payload = self.top_level.serializable(request=self.request)
         expected = {
             "jsonapi": {"version": "1.0"},
-            "meta": {
-                "paginator": {
-                    "count": 3,
-                    "num_pages": 1
-                }
-            },
             "data": [
                 {
                     "type": "article",
@@ -289,6 +299,25 @@ class TestPaginationPageSize(TestCase):
         self.assertEqual(expected, payload)
         self.assertEqual(payload, expected)
 
+    def test_page_size_invalid(self):
+        """
+        Verify non-integer, negative and oversized page[size] values are rejected.
+        """
+        self.top_level.max_per_page = 2
+        for value in ["abc", -1, 3]:
+            self.request.GET["page[size]"] = value
+            with self.assertRaises(SerializationError):
+                self.top_level.serializable(request=self.request)
+
+    def test_page_size_default(self):
+        """
+        Verify the page size given to TopLevel is used without page[size].
+        """
+        self.top_level.per_page = 2
+        payload = self.top_level.serializable(request=self.request)
+        self.assertEqual(len(payload["data"]), 2)
+        self.assertEqual(payload["meta"]["paginator"]["num_pages"], 2)
+
     def test_page_size_one(self):
         """
         Ensure we see just first item in response.
@@ -497,7 +526,7 @@ class TestPaginationPageNumber(TestCase):
         """
         self.request.GET["page[size]"] = 1
         self.request.GET["page[number]"] = 0
-        with self.assertRaises(EmptyPage):
+        with self.assertRaises(SerializationError):
             self.top_level.serializable(request=self.request)
 
     def test_page_negative(self):
@@ -506,7 +535,7 @@ class TestPaginationPageNumber(TestCase):
         """
         self.request.GET["page[size]"] = 1
         self.request.GET["page[number]"] = -1
-        with self.assertRaises(EmptyPage):
+        with self.assertRaises(SerializationError):
             self.top_level.serializable(request=self.request)
 
     def test_first_page(self):
@@ -599,5 +628,142 @@ class TestPaginationPageNumber(TestCase):
         """
         self.request.GET["page[size]"] = 1
         self.request.GET["page[number]"] = 5
-        with self.assertRaises(EmptyPage):
+        with self.assertRaises(SerializationError):
             self.top_level.serializable(request=self.request)
+
+
+class TestPaginationLinks(TestCase):
+    """
+    Verify pagination links preserve the request query.
+    """
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        for i in range(5):
+            Article.objects.create(title="test {}".format(i), author=author)
+        self.article_resource = registry["article"]
+
+    def get_links(self, data, query):
+        request = RequestFactory().get(reverse("article-list"), query)
+        top_level = TopLevel(data=data, links=True)
+        return top_level.serializable(request=request)["links"]
+
+    def test_numbered_links(self):
+        resources = self.article_resource.from_queryset(Article.objects.order_by("pk"))
+        links = self.get_links(resources, [
+            ("filter[tag]", "a"),
+            ("filter[tag]", "b"),
+            ("page[size]", "2"),
+            ("page[number]", "2"),
+        ])
+        base = "http://testserver/articles?filter%5Btag%5D=a&filter%5Btag%5D=b&page%5Bsize%5D=2&"
+        self.assertEqual(links, {
+            "self": "http://testserver/articles",
+            "first": base + "page%5Bnumber%5D=1",
+            "prev": base + "page%5Bnumber%5D=1",
+            "next": base + "page%5Bnumber%5D=3",
+            "last": base + "page%5Bnumber%5D=3",
+        })
+
+    def test_cursor_links(self):
+        class CursorPage(list):
+            previous_cursor = None
+            next_cursor = "abc"
+
+        top_level = TopLevel(data=[], links=True)
+        top_level._current_page = CursorPage()
+        request = RequestFactory().get(reverse("article-list"), {"page[cursor]": "xyz", "sort": "title"})
+        self.assertEqual(top_level.build_links(request), {
+            "self": "http://testserver/articles",
+            "next": "http://testserver/articles?sort=title&page%5Bcursor%5D=abc",
+        })
+
+
+class TestPaginationEndpoint(EndpointTestMixin, TestCase):
+    """
+    Verify endpointset page size defaults and caps.
+    """
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        for i in range(3):
+            Article.objects.create(title="test {}".format(i), author=author)
+        self.authenticate_as()
+
+    def get(self, **params):
+        response = self.client.get(reverse("article-list"), params)
+        return response.status_code, json.loads(response.content.decode("utf-8"))
+
+    def test_endpointset_page_size(self):
+        with patch.object(ArticleEndpointSet, "page_size", 2):
+            status, payload = self.get()
+        self.assertEqual(status, 200)
+        self.assertEqual(len(payload["data"]), 2)
+
+    def test_page_size_over_maximum(self):
+        with patch.object(ArticleEndpointSet, "max_page_size", 2):
+            status, payload = self.get(**{"page[size]": "3"})
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["errors"][0]["detail"], "page[size] must not exceed 2")
+
+    def test_invalid_page_number(self):
+        status, payload = self.get(**{"page[number]": "x"})
+        self.assertEqual(status, 400)
+        status, payload = self.get(**{"page[number]": "9"})
+        self.assertEqual(status, 400)
+
+    def test_unpaginated(self):
+        status, payload = self.get(**{"page[size]": "0"})
+        self.assertEqual(status, 400)
+        with patch.object(ArticleEndpointSet, "allow_unpaginated", True):
+            status, payload = self.get(**{"page[size]": "0"})
+        self.assertEqual(status, 200)
+        self.assertEqual(len(payload["data"]), 3)
+        self.assertNotIn("meta", payload)
+
+
+class TestCursorPaginationEndpoint(EndpointTestMixin, TestCase):
+    """
+    Verify endpointsets paginating with CursorPaginator.
+    """
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        for title in "cabeda":
+            Article.objects.create(title=title, author=author)
+        self.authenticate_as()
+        patcher = patch.object(ArticleEndpointSet, "paginator_class", CursorPaginator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        return response.status_code, json.loads(response.content.decode("utf-8"))
+
+    def titles(self, payload):
+        return "".join(item["attributes"]["title"] for item in payload["data"])
+
+    def test_walk(self):
+        status, payload = self.get(reverse("article-list"), {"sort": "-title", "page[size]": "4"})
+        self.assertEqual(status, 200)
+        self.assertEqual(self.titles(payload), "edcb")
+        self.assertNotIn("meta", payload)
+        self.assertNotIn("prev", payload["links"])
+        self.assertIn("sort=-title&page%5Bsize%5D=4&page%5Bcursor%5D=", payload["links"]["next"])
+        status, payload = self.get(payload["links"]["next"])
+        self.assertEqual(self.titles(payload), "aa")
+        self.assertNotIn("next", payload["links"])
+        status, payload = self.get(payload["links"]["prev"])
+        self.assertEqual(self.titles(payload), "edcb")
+        self.assertNotIn("prev", payload["links"])
+        self.assertIn("next", payload["links"])
+
+    def test_new_rows_do_not_shift_pages(self):
+        status, payload = self.get(reverse("article-list"), {"page[size]": "2"})
+        self.assertEqual(self.titles(payload), "ca")
+        Article.objects.filter(title="c").delete()
+        status, payload = self.get(payload["links"]["next"])
+        self.assertEqual(self.titles(payload), "be")
+
+    def test_invalid_cursor(self):
+        for cursor in ["x", "e30", "WyJhZnRlciIsWyJ4Il1d"]:
+            status, payload = self.get(reverse("article-list"), {"page[cursor]": cursor})
+            self.assertEqual(status, 400)
+            self.assertEqual(payload["errors"][0]["detail"], "page[cursor] is invalid")
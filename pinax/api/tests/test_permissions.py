@@ -0,0 +1,96 @@
+from __future__ import unicode_literals
+
+import json
+
+from django.core.urlresolvers import reverse
+
+from pinax import api
+
+from .endpoints import ArticleEndpointSet
+from .models import (
+    Article,
+    Author,
+)
+from .test import EndpointTestMixin, TestCase
+
+
+class PublicArticles(api.permissions.ObjectPermission):
+
+    def filter_queryset(self, request, queryset, view):
+        if queryset.model is Article:
+            return queryset.filter(title__startswith="Public")
+        return queryset
+
+
+class VisibleAuthors(api.permissions.ObjectPermission):
+
+    def filter_queryset(self, request, queryset, view):
+        if queryset.model is Author:
+            return queryset.exclude(name="Secret")
+        return queryset
+
+
+class BatchPublicArticles(api.permissions.ObjectPermission):
+
+    def __init__(self):
+        self.calls = 0
+
+    def filter_objects(self, request, objs, view):
+        self.calls += 1
+        return [obj for obj in objs if not isinstance(obj, Article) or obj.title.startswith("Public")]
+
+
+class ObjectPermissionTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Author")
+        self.secret_author = Author.objects.create(name="Secret")
+        self.public = Article.objects.create(title="Public 1", author=self.author)
+        self.public_secret_author = Article.objects.create(title="Public 2", author=self.secret_author)
+        self.private = Article.objects.create(title="Private", author=self.author)
+        self.authenticate_as()
+
+    def get(self, url, data=None):
+        response = self.client.get(url, data)
+        return response.status_code, json.loads(response.content.decode("utf-8"))
+
+    def test_queryset_filter_applies_to_list(self):
+        self.use_middleware(ArticleEndpointSet, permissions=[PublicArticles()])
+        status, payload = self.get(reverse("article-list"))
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [item["id"] for item in payload["data"]],
+            [str(self.public.pk), str(self.public_secret_author.pk)]
+        )
+        self.assertEqual(payload["meta"]["paginator"]["count"], 2)
+        self.assertIn("last", payload["links"])
+
+    def test_queryset_filter_applies_to_retrieve(self):
+        self.use_middleware(ArticleEndpointSet, permissions=[PublicArticles()])
+        status, payload = self.get(reverse("article-detail", kwargs=dict(pk=self.private.pk)))
+        self.assertEqual(status, 404)
+
+    def test_queryset_filter_applies_to_included(self):
+        self.use_middleware(ArticleEndpointSet, permissions=[VisibleAuthors()])
+        status, payload = self.get(reverse("article-list"), {"include": "author"})
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [(r["type"], r["id"]) for r in payload["included"]],
+            [("author", str(self.author.pk))]
+        )
+
+    def test_batch_filter_called_once_per_page(self):
+        perm = BatchPublicArticles()
+        self.use_middleware(ArticleEndpointSet, permissions=[perm])
+        status, payload = self.get(reverse("article-list"))
+        self.assertEqual(status, 200)
+        self.assertEqual(len(payload["data"]), 2)
+        self.assertEqual(perm.calls, 1)
+        # counts would include the filtered-out article
+        self.assertNotIn("meta", payload)
+        self.assertNotIn("last", payload["links"])
+
+    def test_batch_filter_applies_to_retrieve(self):
+        self.use_middleware(ArticleEndpointSet, permissions=[BatchPublicArticles()])
+        status, payload = self.get(reverse("article-detail", kwargs=dict(pk=self.private.pk)))
+        self.assertEqual(status, 404)
@@ -0,0 +1,96 @@
+from __future__ import unicode_literals
+
+import os
+import pstats
+import shutil
+import tempfile
+
+from mock import patch
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+
+from ..profiling import CProfileCollector, SamplingCollector
+from .endpoints import ArticleEndpointSet
+from .models import Article, Author
+from .test import EndpointTestMixin, TestCase
+
+
+class ProfilingTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        Article.objects.create(title="Article", author=author)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.authenticate = self.authenticate_as(User(username="staff", is_staff=True))
+        profiling = override_settings(PINAX_API_PROFILING=True, PINAX_API_PROFILE_DIR=self.directory)
+        profiling.enable()
+        self.addCleanup(profiling.disable)
+
+    def test_requested_cprofile(self):
+        response = self.client.get(reverse("article-list"), HTTP_X_PINAX_PROFILE="cprofile")
+        self.assertEqual(response.status_code, 200)
+        name = response["X-Pinax-Profile"]
+        self.assertTrue(name.startswith("ArticleEndpointSet.list."))
+        self.assertEqual(os.listdir(self.directory), [name])
+        stats = pstats.Stats(os.path.join(self.directory, name))
+        self.assertTrue(any(func[2] == "render" for func in stats.stats))
+
+    def test_requested_sampling(self):
+        # no background samples: the one taken when stopping is written
+        with patch.object(SamplingCollector, "run"):
+            response = self.client.get(reverse("article-list"), {"pinax-profile": "sampling"})
+        name = response["X-Pinax-Profile"]
+        self.assertTrue(name.endswith(".collapsed"))
+        with open(os.path.join(self.directory, name)) as fp:
+            (line,) = fp.read().splitlines()
+        stack, count = line.rsplit(" ", 1)
+        self.assertEqual(count, "1")
+        self.assertTrue(stack.endswith("profiling.py:stop;profiling.py:sample"))
+
+    def test_start_failure(self):
+        error = ValueError("Another profiling tool is already active")
+        with patch.object(CProfileCollector, "start", side_effect=error), patch("pinax.api.profiling.logger") as logger:
+            response = self.client.get(reverse("article-list"), HTTP_X_PINAX_PROFILE="cprofile")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Pinax-Profile", response)
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertTrue(logger.exception.called)
+
+    def test_streamed_response(self):
+        with patch.object(ArticleEndpointSet, "allow_stream", True):
+            response = self.client.get(reverse("article-list"), {"format": "ndjson"}, HTTP_X_PINAX_PROFILE="cprofile")
+        name = response["X-Pinax-Profile"]
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 1)
+        self.assertEqual(os.listdir(self.directory), [name])
+        stats = pstats.Stats(os.path.join(self.directory, name))
+        self.assertTrue(any(func[2] == "stream_lines" for func in stats.stats))
+
+    def test_requested_by_non_staff(self):
+        self.authenticate.return_value = AnonymousUser()
+        response = self.client.get(reverse("article-list"), HTTP_X_PINAX_PROFILE="cprofile")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Pinax-Profile", response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_sample_rate(self):
+        self.authenticate.return_value = AnonymousUser()
+        with override_settings(PINAX_API_PROFILE_SAMPLE_RATE=1.0):
+            response = self.client.get(reverse("article-list"))
+        self.assertNotIn("X-Pinax-Profile", response)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        with override_settings(PINAX_API_PROFILING=False):
+            self.client.get(reverse("article-list"), HTTP_X_PINAX_PROFILE="cprofile")
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_collapsed_stacks(self):
+        collector = SamplingCollector(interval=60)
+        collector.start()
+        collector.sample()
+        collector.stop()
+        (stack, count), = collector.stacks.items()
+        self.assertEqual(count, 1)
+        self.assertTrue(stack.endswith("test_profiling.py:test_collapsed_stacks;profiling.py:sample"))
@@ -0,0 +1,91 @@
+from __future__ import unicode_literals
+
+import warnings
+
+from mock import patch
+
+from django.core.urlresolvers import reverse
+from django.test import RequestFactory, override_settings
+
+from ..exceptions import NPlusOneWarning
+from ..jsonapi import TopLevel
+from .. import registry
+from .models import (
+    Article,
+    ArticleTag,
+    Author,
+)
+from .test import EndpointTestMixin, TestCase
+
+
+class QueryAssertionsTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        for i in range(3):
+            author = Author.objects.create(name="Author {}".format(i))
+            Article.objects.create(title="Article {}".format(i), author=author)
+        self.authenticate_as()
+
+    def test_max_queries(self):
+        response = self.assertMaxQueries(reverse("author-list"), 2)
+        self.assertEqual(response.status_code, 200)
+
+    def test_max_queries_exceeded(self):
+        with self.assertRaises(AssertionError):
+            self.assertMaxQueries(reverse("article-list"), 2)
+
+    def test_constant_queries(self):
+        self.assertConstantQueries(reverse("author-list"))
+
+    def test_constant_queries_detects_n_plus_one(self):
+        """
+        Ensure per-article author and tag lookups are caught.
+        """
+        with self.assertRaises(AssertionError):
+            self.assertConstantQueries(reverse("article-list"))
+
+
+class NPlusOneWarningTestCase(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get("/articles")
+        for i in range(3):
+            author = Author.objects.create(name="Author {}".format(i))
+            Article.objects.create(title="Article {}".format(i), author=author)
+
+    def serialize(self, qs):
+        top_level = TopLevel(data=registry["article"].from_queryset(qs))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            top_level.serializable(request=self.request)
+        return [w for w in caught if issubclass(w.category, NPlusOneWarning)]
+
+    @override_settings(PINAX_API_DEBUG=True)
+    def test_warns_in_debug(self):
+        caught = self.serialize(Article.objects.all())
+        self.assertEqual(len(caught), 1)
+        self.assertIn('3 of 3 "article" resources', str(caught[0].message))
+
+    @override_settings(PINAX_API_DEBUG=True)
+    def test_no_warning_when_prefetched(self):
+        qs = Article.objects.select_related("author").prefetch_related("articletag_set")
+        self.assertEqual(self.serialize(qs), [])
+
+    def test_no_warning_without_debug(self):
+        self.assertEqual(self.serialize(Article.objects.all()), [])
+
+
+class PrefetchBatchTestCase(TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        for i in range(3):
+            article = Article.objects.create(title="Article {}".format(i), author=author)
+            ArticleTag.objects.create(name="tag {}".format(i), article=article)
+
+    def test_prefetched_per_batch(self):
+        qs = registry["article"].from_queryset(Article.objects.prefetch_related("articletag_set"))
+        with patch("pinax.api.resource.PREFETCH_BATCH_SIZE", 2), self.assertNumQueries(3):
+            resources = list(qs.iterator())
+        with self.assertNumQueries(0):
+            self.assertEqual([r.obj.articletag_set.all()[0].name for r in resources], ["tag 0", "tag 1", "tag 2"])
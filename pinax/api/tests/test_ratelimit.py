@@ -0,0 +1,86 @@
+from __future__ import unicode_literals
+
+import json
+
+from mock import patch
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+
+from ..ratelimit import CacheStorage, LocalStorage, RateLimit, by_ip, parse_rate
+from .endpoints import ArticleEndpointSet
+from .test import EndpointTestMixin, TestCase
+
+
+class Clock(object):
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimitTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        self.authenticate_as()
+        self.clock = Clock()
+        self.storage = LocalStorage(clock=self.clock)
+        self.url = reverse("article-list")
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("100/m"), (100, 60))
+        self.assertEqual(parse_rate("5/second"), (5, 1))
+
+    def test_throttled(self):
+        self.use_middleware(ArticleEndpointSet, pre=[RateLimit("2/m", storage=self.storage, clock=self.clock)])
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with patch.object(ArticleEndpointSet, "prepare") as prepare:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(prepare.called)
+        self.assertIn("Retry-After", response)
+        payload = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(payload["errors"][0]["title"], "Too Many Requests")
+
+    def test_sliding_window(self):
+        """
+        Ensure the previous window still counts while it overlaps.
+        """
+        self.clock.now = 1150.0  # window [1140, 1200)
+        self.use_middleware(ArticleEndpointSet, pre=[RateLimit("2/m", storage=self.storage, clock=self.clock)])
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.clock.now = 1210.0  # next window; 2 * 5/6 + 1 requests
+        self.assertEqual(self.client.get(self.url).status_code, 429)
+        self.clock.now = 1290.0  # window after; 1 * 1/2 + 1 requests
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_clients_limited_separately(self):
+        self.use_middleware(ArticleEndpointSet, pre=[RateLimit("1/m", key=by_ip, storage=self.storage, clock=self.clock)])
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR="10.0.0.1").status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR="10.0.0.2").status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR="10.0.0.1").status_code, 429)
+
+    def test_endpoints_limited_separately(self):
+        self.use_middleware(ArticleEndpointSet, pre=[RateLimit("1/m", key=by_ip, storage=self.storage, clock=self.clock)])
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(reverse("article-detail", kwargs=dict(pk=1))).status_code, 404)
+
+    def test_local_storage_drops_expired_windows(self):
+        limit = RateLimit("1/m", key=by_ip, storage=self.storage, clock=self.clock)
+        self.use_middleware(ArticleEndpointSet, pre=[limit])
+        for minute in range(10):
+            self.clock.now = 1000.0 + minute * 60
+            self.client.get(self.url)
+        # only the current and previous windows are kept
+        self.assertEqual(len(self.storage.counters), 2)
+
+    def test_cache_storage(self):
+        cache.clear()
+        storage = CacheStorage()
+        self.assertEqual(storage.incr("counter", 60), 1)
+        self.assertEqual(storage.incr("counter", 60), 2)
+        self.assertEqual(storage.get("counter"), 2)
@@ -114,7 +114,9 @@ class ArticleTagsViewSetTestCase(api.TestCase):
                     }
                 ],
                 "links": {
-                    "self": "http://testserver{}".format(self.article_tags_url)
+                    "self": "http://testserver{}".format(self.article_tags_url),
+                    "first": "http://testserver{}".format(self.article_tags_url) + "?page%5Bnumber%5D=1",
+                    "last": "http://testserver{}".format(self.article_tags_url) + "?page%5Bnumber%5D=1",
                 }
             }
 
@@ -216,7 +218,9 @@ class ArticleTagsViewSetTestCase(api.TestCase):
                     }
                 ],
                 "links": {
-                    "self": "http://testserver{}".format(reverse("articletag-list"))
+                    "self": "http://testserver{}".format(reverse("articletag-list")),
+                    "first": "http://testserver{}".format(reverse("articletag-list")) + "?page%5Bnumber%5D=1",
+                    "last": "http://testserver{}".format(reverse("articletag-list")) + "?page%5Bnumber%5D=1",
                 }
             }
 
@@ -354,7 +358,9 @@ class ArticleTagsViewSetTestCase(api.TestCase):
                     }
                 ],
                 "links": {
-                    "self": "http://testserver{}".format(reverse("article-list"))
+                    "self": "http://testserver{}".format(reverse("article-list")),
+                    "first": "http://testserver{}?tag={}&page%5Bnumber%5D=1".format(reverse("article-list"), first_tag),
+                    "last": "http://testserver{}?tag={}&page%5Bnumber%5D=1".format(reverse("article-list"), first_tag),
                 }
             }
 
@@ -4,11 +4,16 @@ from mock import NonCallableMock, patch, sentinel
 
 from django.contrib.auth.models import AnonymousUser
 from django.core.urlresolvers import reverse
+from django.test import RequestFactory
 
 from pinax import api
+from pinax.api.endpoints import EndpointSet
+from pinax.api.exceptions import SerializationError
 
+from .endpoints import ArticleEndpointSet
 from .models import (
     Article,
+    ArticleTag,
     Author,
 )
 
@@ -29,6 +34,8 @@ class ArticleViewSetTestCase(api.TestCase):
                 "jsonapi": {"version": "1.0"},
                 "links": {
                     "self": "http://testserver{}".format(collection_url),
+                    "first": "http://testserver{}".format(collection_url) + "?page%5Bnumber%5D=1",
+                    "last": "http://testserver{}".format(collection_url) + "?page%5Bnumber%5D=1",
                 },
                 "meta": {
                     "paginator": {
@@ -66,6 +73,8 @@ class ArticleViewSetTestCase(api.TestCase):
                 "jsonapi": {"version": "1.0"},
                 "links": {
                     "self": "http://testserver{}".format(collection_url),
+                    "first": "http://testserver{}".format(collection_url) + "?page%5Bnumber%5D=1",
+                    "last": "http://testserver{}".format(collection_url) + "?page%5Bnumber%5D=1",
                 },
                 "meta": {
                     "paginator": {
@@ -306,6 +315,270 @@ class ArticleViewSetTestCase(api.TestCase):
             self.assertDictEqual(expected, payload)
 
 
+class ArticleObjectLookupTestCase(api.TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Author")
+        self.article = Article.objects.create(title="Article", author=self.author)
+        authenticate = patch("pinax.api.authentication.Anonymous.authenticate", autospec=True)
+        authenticate.start().return_value = AnonymousUser()
+        self.addCleanup(authenticate.stop)
+
+    def test_retrieve_joins_to_one_relationships(self):
+        """
+        Ensure the author is fetched with the article (article, tags).
+        """
+        url = reverse("article-detail", kwargs=dict(pk=self.article.pk))
+        response = self.assertMaxQueries(url, 2)
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_missing(self):
+        response = self.client.get(reverse("article-detail", kwargs=dict(pk=self.article.pk + 1)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_destroy(self):
+        response = self.client.delete(reverse("article-detail", kwargs=dict(pk=self.article.pk)))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Article.objects.exists())
+
+    def test_destroy_missing(self):
+        response = self.client.delete(reverse("article-detail", kwargs=dict(pk=self.article.pk + 1)))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Article.objects.exists())
+
+    def delete_with(self, bulk_delete, pk):
+        def destroy(self, request, pk):
+            self.delete_object()
+            return self.render_delete()
+
+        with patch.object(ArticleEndpointSet, "destroy", destroy), \
+                patch.object(ArticleEndpointSet, "bulk_delete", bulk_delete), \
+                patch.object(Article, "delete", autospec=True) as delete:
+            response = self.client.delete(reverse("article-detail", kwargs=dict(pk=pk)))
+        return response, delete
+
+    def test_delete_object(self):
+        response, delete = self.delete_with(False, self.article.pk)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(delete.call_count, 1)
+
+    def test_bulk_delete(self):
+        response, delete = self.delete_with(True, self.article.pk)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(delete.called)
+        self.assertFalse(Article.objects.exists())
+        response, delete = self.delete_with(True, self.article.pk)
+        self.assertEqual(response.status_code, 404)
+
+
+class ArticleSortTestCase(api.TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        self.article_b = Article.objects.create(title="B", author=author)
+        self.article_a = Article.objects.create(title="A", author=author)
+        self.article_c = Article.objects.create(title="B", author=author)
+        self.collection_url = reverse("article-list")
+
+    def get_ids(self, **params):
+        with patch("pinax.api.authentication.Anonymous.authenticate", autospec=True) as mock_authenticate:
+            mock_authenticate.return_value = AnonymousUser()
+            response = self.client.get(self.collection_url, params)
+        payload = json.loads(response.content.decode("utf-8"))
+        return response.status_code, [item["id"] for item in payload.get("data", [])]
+
+    def test_unsorted_uses_primary_key(self):
+        status, ids = self.get_ids()
+        self.assertEqual(status, 200)
+        self.assertEqual(ids, [str(self.article_b.pk), str(self.article_a.pk), str(self.article_c.pk)])
+
+    def test_sort_ascending(self):
+        """
+        Ensure ties are broken by primary key.
+        """
+        status, ids = self.get_ids(sort="title")
+        self.assertEqual(status, 200)
+        self.assertEqual(ids, [str(self.article_a.pk), str(self.article_b.pk), str(self.article_c.pk)])
+
+    def test_sort_descending(self):
+        status, ids = self.get_ids(sort="-title")
+        self.assertEqual(status, 200)
+        self.assertEqual(ids, [str(self.article_b.pk), str(self.article_c.pk), str(self.article_a.pk)])
+
+    def test_sort_invalid_field(self):
+        status, ids = self.get_ids(sort="author")
+        self.assertEqual(status, 400)
+
+    def test_sort_without_resource_class(self):
+        endpointset = EndpointSet()
+        endpointset.request = RequestFactory().get(self.collection_url, {"sort": "title"})
+        with self.assertRaises(SerializationError):
+            endpointset.sort_queryset(Article.objects.all())
+
+    def test_include_without_resource_class(self):
+        endpointset = EndpointSet()
+        endpointset.request = RequestFactory().get(self.collection_url, {"include": "author"})
+        response = endpointset.render(None)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.content.decode("utf-8"))["errors"][0]["detail"],
+            "include is not supported by this endpoint"
+        )
+
+
+class ArticleIncludeTestCase(api.TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Author")
+        self.article = Article.objects.create(title="Article", author=self.author)
+        self.detail_url = reverse("article-detail", kwargs=dict(pk=self.article.pk))
+
+    def get(self, include):
+        with patch("pinax.api.authentication.Anonymous.authenticate", autospec=True) as mock_authenticate:
+            mock_authenticate.return_value = AnonymousUser()
+            response = self.client.get(self.detail_url, {"include": include})
+        return response.status_code, json.loads(response.content.decode("utf-8"))
+
+    def test_include_author(self):
+        status, payload = self.get("author")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [(r["type"], r["id"]) for r in payload["included"]],
+            [("author", str(self.author.pk))]
+        )
+
+    def test_include_invalid_relationship(self):
+        status, payload = self.get("author,publisher")
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["errors"][0]["detail"], "'publisher' is not a valid relationship to include")
+
+    def test_include_invalid_nested_relationship(self):
+        """
+        Ensure nested paths are validated against the related resource class.
+        """
+        status, payload = self.get("author.articles")
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["errors"][0]["detail"], "'articles' is not a valid relationship to include")
+
+    def test_include_list_deduplicated_and_stable(self):
+        Article.objects.create(title="Second", author=self.author)
+        with patch("pinax.api.authentication.Anonymous.authenticate", autospec=True) as mock_authenticate:
+            mock_authenticate.return_value = AnonymousUser()
+            first = self.client.get(reverse("article-list"), {"include": "author"})
+            second = self.client.get(reverse("article-list"), {"include": "author"})
+        payload = json.loads(first.content.decode("utf-8"))
+        self.assertEqual(
+            [(r["type"], r["id"]) for r in payload["included"]],
+            [("author", str(self.author.pk))]
+        )
+        self.assertEqual(first.content, second.content)
+
+    def test_included_excludes_primary_resources(self):
+        other = Author.objects.create(name="Other")
+        included = api.jsonapi.Included(())
+        included.add(api.registry["author"](self.author))
+        included.add(api.registry["article"](self.article))
+        included.add(api.registry["author"](other))
+        included.add(api.registry["author"](Author.objects.get(pk=self.author.pk)))
+        included.add_primary(api.registry["article"](self.article))
+        self.assertEqual(
+            [(r.api_type, r.obj.pk) for r in included],
+            [("author", self.author.pk), ("author", other.pk)]
+        )
+        self.assertEqual(len(included), 2)
+
+    def test_include_validated_against_rendered_data(self):
+        resource_class = api.registry["article"]
+        self.assertIs(api.resource.resource_class_of(resource_class(self.article)), resource_class)
+        self.assertIs(api.resource.resource_class_of([resource_class(self.article)]), resource_class)
+        self.assertIs(api.resource.resource_class_of(resource_class.from_queryset(Article.objects.all())), resource_class)
+        self.assertIsNone(api.resource.resource_class_of(Article.objects.all()))
+        self.assertIsNone(api.resource.resource_class_of([]))
+        endpointset = EndpointSet()
+        endpointset.resource_class = api.registry["author"]
+        endpointset.request = RequestFactory().get(self.detail_url, {"include": "author"})
+        top_level = endpointset.create_top_level(resource_class(self.article))
+        self.assertEqual(top_level.included.tree, api.resource.parse_include(resource_class, "author"))
+
+    def test_parse_include_is_cached(self):
+        resource_class = api.registry["article"]
+        tree = api.resource.parse_include(resource_class, "tags,author")
+        self.assertEqual(tree, (("tags", ()), ("author", ())))
+        self.assertIs(api.resource.parse_include(resource_class, "tags,author"), tree)
+
+
+def nested_endpointset(resource, url, parent=None, id_field=None):
+    endpointset = type(str("Nested{}".format(url.base_name)), (api.ResourceEndpointSet,), {"url": url, "parent": parent})
+    if parent is not None:
+        url.parent = parent.url
+    endpointset.resource_class = type(
+        str("Nested{}".format(resource.__name__)),
+        (resource,),
+        {"endpointset": endpointset, "id_field": id_field},
+    )
+    return endpointset
+
+
+class NestedUrlKwargsTestCase(api.TestCase):
+
+    def setUp(self):
+        authors = nested_endpointset(
+            api.registry["author"],
+            api.url(base_name="author", base_regex=r"authors", lookup={"field": "author", "regex": r"\d+"}),
+            id_field="pk",
+        )
+        articles = nested_endpointset(
+            api.registry["article"],
+            api.url(base_name="article", base_regex=r"articles", lookup={"field": "article", "regex": r"\d+"}),
+            parent=authors,
+            id_field="pk",
+        )
+        self.tags = nested_endpointset(
+            api.registry["articletag"],
+            api.url(base_name="tag", base_regex=r"tags", lookup={"field": "tag", "regex": r"\w+"}),
+            parent=articles,
+        )
+        self.authors = [Author.objects.create(name="Author {}".format(i)) for i in range(3)]
+        for author in self.authors:
+            article = Article.objects.create(title="Article", author=author)
+            ArticleTag.objects.create(name="tag{}".format(author.pk), article=article)
+
+    def expected(self):
+        return [
+            {"author": author.pk, "article": author.article_set.get().pk, "tag": "tag{}".format(author.pk)}
+            for author in self.authors
+        ]
+
+    def test_ancestor_keys_read_from_columns(self):
+        expected = self.expected()
+        resources = self.tags.resource_class.from_queryset(ArticleTag.objects.order_by("article__author"))
+        with self.assertNumQueries(1):
+            kwargs = [resource.resolve_url_kwargs() for resource in resources]
+        self.assertEqual(kwargs, expected)
+
+    def test_unannotated_objects_load_ancestors(self):
+        expected = self.expected()
+        tags = ArticleTag.objects.order_by("article__author")
+        self.assertEqual([self.tags.resource_class(tag).resolve_url_kwargs() for tag in tags], expected)
+
+    def test_ancestor_keys_after_binding(self):
+        resource_class = type(str("LateResource"), (self.tags.resource_class,), {"endpointset": None})
+        self.assertIsNone(api.resource.ancestor_key_paths(resource_class))
+        resource_class.endpointset = self.tags
+        self.assertEqual(
+            api.resource.ancestor_key_paths(resource_class),
+            api.resource.ancestor_key_paths(self.tags.resource_class),
+        )
+        self.assertIsNotNone(api.resource.ancestor_key_paths(resource_class))
+
+    def test_ancestor_without_id_field(self):
+        self.tags.parent.resource_class.id_field = None
+        api.resource.bound_key_paths.cache_clear()
+        self.assertIsNone(api.resource.ancestor_key_paths(self.tags.resource_class))
+        tag = ArticleTag.objects.order_by("article__author").first()
+        self.assertEqual(self.tags.resource_class(tag).resolve_url_kwargs(), self.expected()[0])
+
+
 class ResolveValueTestCase(api.TestCase):
 
     def test_should_call_callables(self):
@@ -355,3 +628,11 @@ class ResourceTestCase(api.TestCase):
 
     def test_should_allow_comparison(self):
         self.assertTrue(self.resource == self.resource)
+
+    def test_iterable_forwards_arguments(self):
+        qs = Article.objects.all()
+        # Django 1.11+ signature
+        with patch.object(api.resource.ModelIterable, "__init__", return_value=None) as init:
+            iterable = api.resource.ResourceIterable(api.resource.Resource, qs, chunked_fetch=True)
+        init.assert_called_once_with(qs, chunked_fetch=True)
+        self.assertIs(iterable.resource_class, api.resource.Resource)
@@ -0,0 +1,82 @@
+from __future__ import unicode_literals
+
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+
+from pinax import api
+
+from .models import Article, Author
+from .router_urls import router
+from .test import EndpointTestMixin, TestCase
+
+
+class RouterTestCase(TestCase):
+
+    def test_match(self):
+        (callback, name), kwargs = router.match("articles")
+        self.assertEqual((name, kwargs), ("article-list", {}))
+        (callback, name), kwargs = router.match("articles/5")
+        self.assertEqual((name, kwargs), ("article-detail", {"pk": "5"}))
+        (callback, name), kwargs = router.match("articles/5/relationships/tags")
+        self.assertEqual((name, kwargs), ("article-tags-relationship-detail", {"pk": "5"}))
+        (callback, name), kwargs = router.match("articletags/pinax")
+        self.assertEqual((name, kwargs), ("articletag-detail", {"tag": "pinax"}))
+
+    def test_no_match(self):
+        for path in ["", "articles/", "articles/x", "articles/5/relationships/missing", "missing"]:
+            self.assertIsNone(router.match(path))
+
+    def test_regex_segments(self):
+        router = api.Router()
+        url = api.url(base_name="item", base_regex=r"items?", lookup={"field": "slug", "regex": r"[a-z]+"})
+        parent = api.url(base_name="shop", base_regex=r"shops", lookup={"field": "shop", "regex": r"\d+"})
+        url.parent = parent
+        router.add(url.detail_segments(), "callback", "shop-item-detail")
+        self.assertEqual(router.match("shops/1/item/abc"), (("callback", "shop-item-detail"), {"shop": "1", "slug": "abc"}))
+        self.assertEqual(router.match("shops/1/items/abc")[1], {"shop": "1", "slug": "abc"})
+        self.assertIsNone(router.match("shops/1/item/ABC"))
+
+
+@override_settings(ROOT_URLCONF="pinax.api.tests.router_urls")
+class RouterRequestTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Author")
+        self.article = Article.objects.create(title="Article", author=author)
+        self.authenticate_as()
+
+    def test_reverse_names(self):
+        self.assertEqual(reverse("article-list"), "/articles")
+        self.assertEqual(reverse("article-detail", kwargs={"pk": self.article.pk}), "/articles/{}".format(self.article.pk))
+
+    def test_dispatch(self):
+        response = self.client.get(reverse("article-detail", kwargs={"pk": self.article.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.resolver_match.url_name, "article-detail")
+        self.assertEqual(response.resolver_match.kwargs, {"pk": str(self.article.pk)})
+
+    def test_unknown_path(self):
+        response = self.client.get("/articles/x")
+        self.assertEqual(response.status_code, 404)
+
+
+class URLMemoTestCase(TestCase):
+
+    def test_memoized_until_parent_changes(self):
+        url = api.url(base_name="item", base_regex=r"items", lookup={"field": "pk", "regex": r"\d+"})
+        regex = url.detail_regex()
+        self.assertIs(url.detail_regex(), regex)
+        url.parent = api.url(base_name="shop", base_regex=r"shops", lookup={"field": "shop", "regex": r"\d+"})
+        self.assertEqual(url.base_name, "shop-item")
+        self.assertEqual(url.detail_regex(), r"shops/(?P<shop>\d+)/items/(?P<pk>\d+)")
+
+    def test_ancestor_changes_discard_memo(self):
+        url = api.url(base_name="item", base_regex=r"items", lookup={"field": "pk", "regex": r"\d+"})
+        url.parent = api.url(base_name="shop", base_regex=r"shops", lookup={"field": "shop", "regex": r"\d+"})
+        self.assertEqual(url.base_name, "shop-item")
+        self.assertEqual(url.collection_segments(), ("shops", ("shop", r"\d+"), "items"))
+        url.parent.parent = api.url(base_name="mall", base_regex=r"malls", lookup={"field": "mall", "regex": r"\d+"})
+        self.assertEqual(url.base_name, "mall-shop-item")
+        self.assertEqual(url.detail_regex(), r"malls/(?P<mall>\d+)/shops/(?P<shop>\d+)/items/(?P<pk>\d+)")
+        url.parent.base_regex = r"stores"
+        self.assertEqual(url.collection_segments()[2:], ("stores", ("shop", r"\d+"), "items"))
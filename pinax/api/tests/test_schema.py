@@ -0,0 +1,129 @@
+from __future__ import unicode_literals
+
+import json
+
+from django.core.urlresolvers import reverse
+
+from pinax import api
+from pinax.api.schema import Schema, compile_schema
+
+from .models import Article, ArticleTag, Author
+from .test import EndpointTestMixin, TestCase
+
+
+class ArticleSchemaResource(api.Resource):
+
+    api_type = "article"
+    attributes = [
+        "title",
+        api.Attribute("created", scope="r"),
+    ]
+    relationships = {
+        "tags": api.Relationship("articletag", collection=True),
+        "author": api.Relationship("author"),
+    }
+
+
+class SchemaTestCase(TestCase):
+
+    def setUp(self):
+        self.schema = Schema(ArticleSchemaResource)
+
+    def pointers(self, data, pointer="/data"):
+        return [err["source"]["pointer"] for err in self.schema.errors(data, pointer)]
+
+    def test_valid(self):
+        data = {
+            "type": "article",
+            "attributes": {"title": "Title"},
+            "relationships": {
+                "author": {"data": {"type": "author", "id": "1"}},
+                "tags": {"data": [{"type": "articletag", "id": "pinax"}]},
+            },
+        }
+        self.assertEqual(self.schema.errors(data), [])
+        self.assertEqual(self.schema.errors({"attributes": {}, "relationships": {"author": {"data": None}}}), [])
+
+    def test_all_errors_reported(self):
+        data = {
+            "type": "author",
+            "attributes": {"title": "Title", "created": "now", "color": "red"},
+            "relationships": {
+                "author": {"data": {"type": "articletag", "id": "1"}},
+                "tags": {"data": [{"type": "articletag"}, {"type": "articletag", "id": None}]},
+                "editor": {"data": None},
+            },
+        }
+        self.assertEqual(sorted(self.pointers(data, "/data/3")), [
+            "/data/3/attributes/color",
+            "/data/3/attributes/created",
+            "/data/3/relationships/author/data/type",
+            "/data/3/relationships/editor",
+            "/data/3/relationships/tags/data/0",
+            "/data/3/relationships/tags/data/1/id",
+            "/data/3/type",
+        ])
+
+    def test_shape(self):
+        self.assertEqual(self.pointers([]), ["/data"])
+        self.assertEqual(self.pointers({}), ["/data"])
+        self.assertEqual(self.pointers({"attributes": []}), ["/data/attributes"])
+        self.assertEqual(self.pointers({"attributes": {}, "relationships": {"tags": {"data": {}}}}), ["/data/relationships/tags/data"])
+        self.assertEqual(self.pointers({"attributes": {}, "relationships": {"author": {}}}), ["/data/relationships/author"])
+
+    def test_not_strict(self):
+        resource_class = type(str("LenientResource"), (ArticleSchemaResource,), {"strict_attributes": False})
+        data = {"attributes": {"color": "red"}, "relationships": {"editor": {"data": None}}}
+        self.assertEqual(Schema(resource_class).errors(data), [])
+
+    def test_compiled_once(self):
+        self.assertIs(compile_schema(ArticleSchemaResource), compile_schema(ArticleSchemaResource))
+
+
+class ValidatePayloadTestCase(EndpointTestMixin, TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Author")
+        self.article = Article.objects.create(title="Article", author=self.author)
+        ArticleTag.objects.create(name="kept", article=self.article)
+        self.authenticate_as()
+
+    def send(self, method, url, payload):
+        response = getattr(self.client, method)(url, data=json.dumps(payload), content_type="application/vnd.api+json")
+        return response.status_code, json.loads(response.content.decode("utf-8"))
+
+    def test_unknown_attribute(self):
+        status, payload = self.send("post", reverse("article-list"), {
+            "data": {"type": "article", "attributes": {"title": "New", "color": "red"}},
+        })
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["errors"], [{
+            "status": "400",
+            "detail": 'Unknown attribute "color".',
+            "source": {"pointer": "/data/attributes/color"},
+        }])
+        self.assertEqual(Article.objects.count(), 1)
+
+    def test_collection_errors_reported_together(self):
+        url = reverse("article-tags-relationship-detail", kwargs=dict(pk=self.article.pk))
+        status, payload = self.send("patch", url, {
+            "data": [
+                {"type": "articletag", "attributes": {"tag": "one"}},
+                {"type": "article", "attributes": {"tag": "two"}},
+                {"type": "articletag"},
+            ],
+        })
+        self.assertEqual(status, 400)
+        self.assertEqual(
+            [err["source"]["pointer"] for err in payload["errors"]],
+            ["/data/1/type", "/data/2"]
+        )
+        self.assertEqual(list(ArticleTag.objects.values_list("name", flat=True)), ["kept"])
+
+    def test_null_to_one_relationship(self):
+        status, payload = self.send("patch", reverse("article-detail", kwargs=dict(pk=self.article.pk)), {
+            "data": {"type": "article", "attributes": {}, "relationships": {"author": {"data": None}}},
+        })
+        # the relationship is cleared before full_clean() rejects the missing author
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["errors"][0]["source"]["pointer"], "/data/relationships/author")
@@ -0,0 +1,52 @@
+from __future__ import unicode_literals
+
+from mock import patch
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from pinax import api
+from pinax.api.warmup import warm_up
+
+from .endpoints import AuthorEndpointSet
+from .test import TestCase
+
+
+class WarmUpTestCase(TestCase):
+
+    def test_report(self):
+        with patch("pinax.api.warmup.logger") as logger:
+            report = warm_up()
+        self.assertEqual(list(report), ["urls", "relationships", "resources"])
+        self.assertTrue(logger.info.called)
+
+    def test_relationships_pinned_to_bound_classes(self):
+        warm_up()
+        rel = api.registry["article"].relationships["author"]
+        self.assertIs(rel._resource_class, api.registry["author"])
+        self.assertIs(rel.resource_class().endpointset, AuthorEndpointSet)
+
+    def test_missing_api_type(self):
+        class BrokenResource(api.Resource):
+            api_type = "broken"
+            relationships = {
+                "owner": api.Relationship("missing"),
+            }
+
+        with patch.dict(api.registry, {"broken": BrokenResource}):
+            with self.assertRaises(ImproperlyConfigured) as context:
+                warm_up()
+        self.assertEqual(
+            str(context.exception),
+            'Relationship "owner" of resource "broken" refers to unregistered api_type "missing".'
+        )
+
+    def test_ready_opt_in(self):
+        config = apps.get_app_config("pinax_api")
+        with patch("pinax.api.warmup.warm_up") as warm_up:
+            config.ready()
+            self.assertFalse(warm_up.called)
+            with override_settings(PINAX_API_WARMUP=True):
+                config.ready()
+            self.assertTrue(warm_up.called)
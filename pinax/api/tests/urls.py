@@ -5,6 +5,7 @@ from .endpoints import (
     ArticleTagEndpointSet,
     AuthorEndpointSet,
 )
+from .relationships import ArticleTagStreamEndpointSet
 
 
 urlpatterns = []
@@ -12,4 +13,5 @@ urlpatterns.extend(itertools.chain(
     ArticleEndpointSet.as_urls(),
     ArticleTagEndpointSet.as_urls(),
     AuthorEndpointSet.as_urls(),
+    ArticleTagStreamEndpointSet.as_urls(ArticleEndpointSet.url, "tags-stream"),
 ))
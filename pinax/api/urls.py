@@ -1,38 +1,95 @@
 from __future__ import unicode_literals
 
 
+REGEX_CHARS = frozenset(".^$*+?{}[]\\|()")  # marks base_regex parts which are not literal
+
+
 class URL(object):
+    """
+    URL layout of an endpointset. `base_name` and the regexes are memoized;
+    any change to a URL (i.e. `api.bind()` assigning `parent`) discards the
+    memo of every URL, since a nested URL includes its ancestors' regexes.
+    """
+
+    # bumped on every change; memos from an older generation are stale
+    generation = 0
+    tracked = frozenset(["_base_name", "base_regex", "lookup", "parent"])
 
     def __init__(self, base_name, base_regex=None, lookup=None, parent=None):
+        self._memo = {}
+        self._generation = None
         self._base_name = base_name
         self.base_regex = base_regex
         self.lookup = lookup
         self.parent = parent
 
+    def __setattr__(self, name, value):
+        if name in self.tracked:
+            URL.generation += 1
+        super(URL, self).__setattr__(name, value)
+
+    def memoize(self, key, func):
+        if self._generation != URL.generation:
+            self._memo = {}
+            self._generation = URL.generation
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = func()
+            return value
+
     @property
     def base_name(self):
-        parts = []
-        if self.parent is not None:
-            parts.append(self.parent.base_name)
-        parts.append(self._base_name)
-        return "-".join(parts)
+        def build():
+            parts = []
+            if self.parent is not None:
+                parts.append(self.parent.base_name)
+            parts.append(self._base_name)
+            return "-".join(parts)
+        return self.memoize("base_name", build)
 
     def collection_regex(self, trailing_slash=False):
-        parts = []
-        if self.parent is not None:
-            parts.append(self.parent.detail_regex(trailing_slash=True))
-        parts.append(self.base_regex)
-        if trailing_slash:
-            parts.append("/")
-        return "".join(parts)
+        def build():
+            parts = []
+            if self.parent is not None:
+                parts.append(self.parent.detail_regex(trailing_slash=True))
+            parts.append(self.base_regex)
+            if trailing_slash:
+                parts.append("/")
+            return "".join(parts)
+        return self.memoize(("collection_regex", trailing_slash), build)
 
     def detail_regex(self, trailing_slash=False):
-        parts = []
-        parts.append(r"{}/(?P<{}>{})".format(
-            self.collection_regex(trailing_slash=False),
-            self.lookup["field"],
-            self.lookup["regex"],
-        ))
-        if trailing_slash:
-            parts.append("/")
-        return "".join(parts)
+        def build():
+            parts = []
+            parts.append(r"{}/(?P<{}>{})".format(
+                self.collection_regex(trailing_slash=False),
+                self.lookup["field"],
+                self.lookup["regex"],
+            ))
+            if trailing_slash:
+                parts.append("/")
+            return "".join(parts)
+        return self.memoize(("detail_regex", trailing_slash), build)
+
+    def collection_segments(self):
+        """
+        Path segments of the collection URL: literal strings, or
+        `(kwarg, regex)` pairs (kwarg is None for unnamed regex segments).
+        """
+        def build():
+            segments = []
+            if self.parent is not None:
+                segments.extend(self.parent.detail_segments())
+            for part in self.base_regex.split("/"):
+                if REGEX_CHARS.intersection(part):
+                    segments.append((None, part))
+                else:
+                    segments.append(part)
+            return tuple(segments)
+        return self.memoize("collection_segments", build)
+
+    def detail_segments(self):
+        def build():
+            return self.collection_segments() + ((self.lookup["field"], self.lookup["regex"]),)
+        return self.memoize("detail_segments", build)
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals
+
+import collections
+import logging
+import timeit
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.urlresolvers import get_resolver
+
+from .mixins import to_one_fields
+from .registry import registry
+from .resource import ancestor_key_paths
+from .schema import compile_schema
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """
+    Does the work the first requests would otherwise pay for: importing
+    the URLconf (which binds resources, compiles endpointset chains and
+    builds documentation views) and populating reverse() lookups, pinning
+    relationship resource classes, and compiling per-resource metadata.
+    Raises ImproperlyConfigured for relationships to unregistered types.
+    Returns an OrderedDict of step timings in seconds, which is also logged.
+    """
+    report = collections.OrderedDict()
+
+    def step(name, func):
+        start = timeit.default_timer()
+        func()
+        report[name] = timeit.default_timer() - start
+
+    step("urls", warm_up_urls)
+    step("relationships", resolve_relationships)
+    step("resources", compile_resources)
+    logger.info(
+        "pinax-api warm-up: %s (%d resources)",
+        ", ".join("{} {:.1f}ms".format(name, seconds * 1000) for name, seconds in report.items()),
+        len(registry),
+    )
+    return report
+
+
+def warm_up_urls():
+    if getattr(settings, "ROOT_URLCONF", None):
+        # imports the URLconf and builds the reverse() lookup tables
+        get_resolver().reverse_dict
+
+
+def resolve_relationships():
+    for api_type, resource_class in sorted(registry.items()):
+        for related_name, rel in sorted(resource_class.relationships.items()):
+            if rel.resolve() is None:
+                raise ImproperlyConfigured(
+                    'Relationship "{}" of resource "{}" refers to unregistered api_type "{}".'.format(
+                        related_name,
+                        api_type,
+                        rel.api_type,
+                    )
+                )
+
+
+def compile_resources():
+    for resource_class in registry.values():
+        compile_schema(resource_class)
+        ancestor_key_paths(resource_class)
+        if getattr(resource_class, "model", None) is not None:
+            to_one_fields(resource_class)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+"""
+Benchmarks pinax-api serialization, includes, pagination and dispatch
+against generated fixtures of the test app models on SQLite.
+
+    python runbenchmarks.py --sizes 1000,10000 --output bench.json
+    python runbenchmarks.py --compare bench.json
+
+Each scenario reports requests/sec, p50/p99 latency, queries per request
+and peak traced memory. Results are written as JSON so runs from different
+commits can be compared with --compare. Cold `import pinax.api` time is
+reported as well.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from timeit import default_timer
+
+import django
+
+from django.conf import settings
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+DEFAULT_SETTINGS = dict(
+    INSTALLED_APPS=[
+        "django.contrib.auth",
+        "django.contrib.contenttypes",
+        "django.contrib.sessions",
+        "django.contrib.sites",
+        "pinax.api",
+        "pinax.api.tests"
+    ],
+    MIDDLEWARE_CLASSES=[
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+    ],
+    DATABASES={
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+    },
+    SITE_ID=1,
+    ROOT_URLCONF="pinax.api.tests.urls",
+    SECRET_KEY="notasecret",
+    ALLOWED_HOSTS=["testserver"],
+)
+
+BATCH_SIZE = 500  # rows per bulk_create() call
+AUTHORS_PER_ARTICLE = 0.1
+TAGS_PER_ARTICLE = 2
+
+
+def generate_fixtures(size):
+    from pinax.api.tests.models import Article, ArticleTag, Author
+
+    ArticleTag.objects.all().delete()
+    Article.objects.all().delete()
+    Author.objects.all().delete()
+    authors = max(1, int(size * AUTHORS_PER_ARTICLE))
+    Author.objects.bulk_create(
+        (Author(name="Author {}".format(i)) for i in range(authors)),
+        batch_size=BATCH_SIZE,
+    )
+    author_pks = list(Author.objects.values_list("pk", flat=True))
+    Article.objects.bulk_create(
+        (Article(title="Article {}".format(i), author_id=author_pks[i % authors]) for i in range(size)),
+        batch_size=BATCH_SIZE,
+    )
+    article_pks = list(Article.objects.values_list("pk", flat=True))
+    ArticleTag.objects.bulk_create(
+        (
+            ArticleTag(article_id=pk, name="tag{}".format(j))
+            for pk in article_pks
+            for j in range(TAGS_PER_ARTICLE)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return article_pks[len(article_pks) // 2]
+
+
+def scenarios(size, article_pk):
+    from django.core.urlresolvers import reverse
+    from pinax import api
+    from pinax.api.jsonapi import TopLevel
+    from pinax.api.tests.models import Article
+    from django.test import RequestFactory
+
+    request = RequestFactory().get("/")
+
+    def serialize():
+        qs = api.registry["article"].from_queryset(Article.objects.order_by("pk"))
+        return TopLevel(data=qs).serializable(request=request)
+
+    last_page = max(1, -(-size // 100))
+    detail_kwargs = dict(pk=article_pk)
+    return [
+        ("serialize", serialize),
+        ("list", reverse("article-list")),
+        ("list-page-last", reverse("article-list") + "?page[number]={}".format(last_page)),
+        ("list-sorted", reverse("article-list") + "?sort=-title"),
+        ("list-include", reverse("article-list") + "?include=author,tags"),
+        ("retrieve", reverse("article-detail", kwargs=detail_kwargs)),
+        ("retrieve-include", reverse("article-detail", kwargs=detail_kwargs) + "?include=author,tags"),
+        ("relationship", reverse("article-tags-relationship-detail", kwargs=detail_kwargs)),
+        ("author-list", reverse("author-list")),
+    ]
+
+
+def percentile(timings, pct):
+    ordered = sorted(timings)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_scenario(client, target, requests, warmup):
+    from django.db import reset_queries
+    from pinax.api.instrumentation import QueryCounter
+
+    if callable(target):
+        call = target
+    else:
+        def call():
+            response = client.get(target)
+            assert response.status_code == 200, "{} returned {}".format(target, response.status_code)
+            return response
+
+    for _ in range(warmup):
+        call()
+    timings = []
+    queries = None
+    for _ in range(requests):
+        reset_queries()
+        counter = QueryCounter()
+        start = default_timer()
+        with counter:
+            call()
+        timings.append((default_timer() - start) * 1000)
+        queries = len(counter)
+    peak = None
+    if tracemalloc is not None:
+        gc.collect()
+        tracemalloc.start()
+        call()
+        peak = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    total = sum(timings) / 1000
+    return {
+        "requests_per_second": round(requests / total, 2),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "queries": queries,
+        "peak_memory_kb": peak,
+    }
+
+
+IMPORT_TIME_SCRIPT = """
+from timeit import default_timer
+start = default_timer()
+import pinax.api
+print((default_timer() - start) * 1000)
+"""
+
+
+def measure_import_time(runs):
+    """
+    Median cold `import pinax.api` time in a fresh interpreter, which is what
+    short-lived worker processes pay on start.
+    """
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_TIME_SCRIPT],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        timings.append(float(output.decode("ascii")))
+    return round(percentile(timings, 50), 3)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    before = dict(((r["size"], r["scenario"]), r) for r in previous["results"])
+    if "import_time_ms" in previous:
+        print("import pinax.api: {}ms before, {}ms after".format(previous["import_time_ms"], current["import_time_ms"]))
+    print("{:>8} {:<18} {:>12} {:>12} {:>8}".format("size", "scenario", "req/s before", "req/s after", "change"))
+    for result in current["results"]:
+        old = before.get((result["size"], result["scenario"]))
+        if old is None:
+            continue
+        change = (result["requests_per_second"] / old["requests_per_second"] - 1) * 100
+        print("{:>8} {:<18} {:>12} {:>12} {:>+7.1f}%".format(
+            result["size"],
+            result["scenario"],
+            old["requests_per_second"],
+            result["requests_per_second"],
+            change,
+        ))
+
+
+def runbenchmarks(argv):
+    parser = argparse.ArgumentParser(description="Benchmark pinax-api endpoints.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated Article row counts")
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per scenario")
+    parser.add_argument("--import-runs", type=int, default=5, help="fresh interpreters used to time import")
+    parser.add_argument("--scenario", action="append", help="only run the named scenario(s)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="compare against a previous JSON results file")
+    args = parser.parse_args(argv)
+
+    if not settings.configured:
+        settings.configure(**DEFAULT_SETTINGS)
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.core.signals import request_started
+    from django.db import reset_queries
+    from django.test import Client
+
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    # keep the query log intact across test client requests so queries
+    # can be counted (as django.test.utils.CaptureQueriesContext does)
+    request_started.disconnect(reset_queries)
+    client = Client()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        },
+        "results": [],
+        "import_time_ms": measure_import_time(args.import_runs),
+    }
+    print("import pinax.api: {}ms".format(report["import_time_ms"]))
+    for size in [int(s) for s in args.sizes.split(",")]:
+        article_pk = generate_fixtures(size)
+        for name, target in scenarios(size, article_pk):
+            if args.scenario and name not in args.scenario:
+                continue
+            result = {"size": size, "scenario": name}
+            result.update(run_scenario(client, target, args.requests, args.warmup))
+            report["results"].append(result)
+            print("{size:>8} {scenario:<18} {requests_per_second:>10} req/s  p50 {p50_ms:>9}ms  "
+                  "p99 {p99_ms:>9}ms  {queries:>4} queries  {peak_memory_kb} KiB".format(**result))
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(json.load(fp), report)
+
+
+if __name__ == "__main__":
+    runbenchmarks(sys.argv[1:])
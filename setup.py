@@ -1,4 +1,5 @@
 import codecs
+import re
 
 from os import path
 from setuptools import find_packages, setup
@@ -10,13 +11,17 @@ def read(*parts):
         return fp.read()
 
 
+def read_version():
+    return re.search(r'^__version__ = "([^"]+)"', read("pinax", "api", "__init__.py"), re.M).group(1)
+
+
 setup(
     author="Pinax Developers",
     author_email="developers@pinaxproject.com",
     description="RESTful API adhering to the JSON API specification",
     name="pinax-api",
     long_description=read("README.md"),
-    version="0.1.0",
+    version=read_version(),
     url="http://github.com/pinax/pinax-api/",
     license="MIT",
     packages=find_packages(),